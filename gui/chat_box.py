@@ -2,18 +2,24 @@ import uuid
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtWebEngineCore import (
+    QWebEngineUrlRequestJob,
+    QWebEngineUrlScheme,
+    QWebEngineUrlSchemeHandler,
+)
 from PyQt6.QtCore import (
     QObject,
     pyqtSlot,
     QByteArray,
     QBuffer,
     QIODevice,
-    QThread,
     QTimer,
+    Qt,
 )
 from PyQt6.QtGui import QImage, QIcon
 import os
 import json
+import time
 import base64
 from pathlib import Path
 from datetime import datetime
@@ -22,6 +28,25 @@ from utils.settings_manager import get_default_model
 from utils.chat_storage import ChatStorage
 from collections import OrderedDict
 from utils.provider_utils import ProviderRequest
+from utils.stream_utils import ChunkCoalescer, FragmentBuffer
+from utils.image_store import IMAGE_SCHEME, ImageStore, guess_image_mime
+from utils.web_assets import (
+    WEB_ASSETS,
+    get_asset_mime,
+    link_missing_assets,
+    load_web_assets,
+)
+from utils.connection_manager import get_connection_stats
+from utils.endpoint_pool import get_endpoint_stats
+from utils.context_manager import ContextManager
+from utils.metrics_log import record_metrics
+from utils.stream_recording import (
+    FrameMonitor,
+    ReplayRequest,
+    get_replay_settings,
+    list_recordings,
+    load_recording,
+)
 import re
 
 DEBUG = "-debug" in __import__("sys").argv
@@ -30,6 +55,10 @@ DEBUG = "-debug" in __import__("sys").argv
 class Message:
     def __init__(self, role, content=None, model=None, message_id=None):
         self.role = role
+        self.version = 0  # Bumped on every change, keys the cached render fragments
+        self.render_cache = {}  # Serialized index/body fragments for render_version
+        self.render_version = None
+        self.stream = None  # FragmentBuffer holding streamed text, joined lazily
         self.content = content or []
         self.model = model
         self.id = message_id or str(uuid.uuid4())
@@ -38,6 +67,85 @@ class Message:
         self.child_message = None  # Reference to the assistant's response message
         self.is_editing = False
         self.original_content = None  # Store original content during edits
+        self.rendered_length = 0  # Length of the text already shown in the page
+        self.needs_replace = False  # Content changed in a way a delta can't express
+        self.metrics = None  # Timing and token stats of the response that produced it
+        self.truncated = None  # Why a streamed answer stopped early, None when complete
+
+    @property
+    def content(self):
+        """Message content, with any streamed text materialized on access."""
+        if self.stream is not None and self._stream_dirty:
+            others = [item for item in self._content if item.get("type") != "text"]
+            self._content = [{"type": "text", "text": self.stream.text()}] + others
+            self._stream_dirty = False
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value or []
+        self.stream = None
+        self._stream_dirty = False
+        self.version += 1
+
+    @property
+    def model(self):
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        # The model name is shown as the sender, so it is part of the render
+        self._model = value
+        self.version += 1
+
+    def append_text(self, text):
+        """Append streamed text without rebuilding the content list."""
+        if self.stream is None:
+            self.stream = FragmentBuffer(self.get_text())
+        self.stream.append(text)
+        self._stream_dirty = True
+        self.version += 1
+
+    def set_metrics(self, metrics):
+        """Attach response metrics, they are shown under the message."""
+        self.metrics = metrics
+        self.version += 1
+
+    def set_truncated(self, reason):
+        """Mark the answer as cut off mid-stream, or whole again with None."""
+        self.truncated = reason
+        self.version += 1
+
+    def get_render_fragment(self, kind, build):
+        """Return a cached serialized render fragment, rebuilding it only after a change."""
+        render_version = (self.version, self.id)
+        if self.render_version != render_version:
+            self.render_cache = {}
+            self.render_version = render_version
+        fragment = self.render_cache.get(kind)
+        if fragment is None:
+            fragment = json.dumps(build(self))
+            self.render_cache[kind] = fragment
+        return fragment
+
+    def get_text_length(self):
+        """Get the length of the text content without joining streamed fragments."""
+        if self.stream is not None:
+            return len(self.stream)
+        return len(self.get_text())
+
+    def get_text_from(self, offset):
+        """Get the text content after offset."""
+        if self.stream is not None:
+            return self.stream.text_from(offset)
+        return self.get_text()[offset:]
+
+    def mark_dirty(self, replace=False):
+        """Flag this message for the next render pass of the parent chat."""
+        if replace:
+            self.needs_replace = True
+        if self.parent_chat:
+            self.parent_chat.mark_message_dirty(self.id)
 
     def submit(self):
         """Submit this message and generate a response."""
@@ -72,6 +180,15 @@ class Message:
 
         self.parent_chat.messages[self.child_message.id] = self.child_message
 
+        # Reset the response so streamed deltas start from an empty message
+        self.child_message.content = []
+        self.child_message.metrics = None
+        self.child_message.truncated = None
+        self.child_message.model = self.parent_chat.active_model or get_default_model()
+
+        # Full rebuild once per submission, deltas are appended to the live node
+        self.parent_chat.request_full_render()
+
         # Get messages up to this point
         messages_to_send = self.parent_chat.get_messages_for_request(self.id)
 
@@ -94,6 +211,22 @@ class Message:
             # For user messages, just resubmit
             self.submit()
 
+    def continue_response(self):
+        """Resume a truncated answer, sending the partial text as the start of the reply."""
+        chat = self.parent_chat
+        if self.role != "assistant" or not self.truncated or not chat:
+            return
+        if chat.is_receiving or next(reversed(chat.messages.values())) is not self:
+            if DEBUG:
+                print("Only the last answer can be continued, once nothing is streaming")
+            return
+
+        chat.set_message_truncated(self, None)
+        chat.set_message_metrics(self, None)
+        # The partial answer is the last message, the model carries on from it
+        messages_to_send = chat.get_messages_for_request(self.id)
+        chat.start_provider_request(messages_to_send, message_id=self.id)
+
     def _find_parent_message(self):
         """Find the parent message that generated this response."""
         if self.role != "assistant":
@@ -114,6 +247,8 @@ class Message:
 
     def get_text(self):
         """Get the text content of the message"""
+        if self.stream is not None:
+            return self.stream.text()
         return next(
             (item["text"] for item in self.content if item["type"] == "text"), ""
         )
@@ -139,23 +274,16 @@ class Message:
         if isinstance(chunk, str) and chunk.startswith("Error:"):
             self.content = [{"type": "text", "text": f"⚠️ {chunk}"}]
             self.model = self.parent_chat.active_model or get_default_model()
+            self.mark_dirty(replace=True)
             return
 
         try:
-            # If this is an existing message being edited, append the chunk
-            if self.content and self.content[0]["type"] == "text":
-                current_text = self.content[0]["text"]
-                self.content = [{"type": "text", "text": current_text + chunk}]
-            else:
-                # For new messages, set the content directly
-                self.content = [{"type": "text", "text": chunk}]
+            self.append_text(chunk)
 
             self.model = self.parent_chat.active_model or get_default_model()
 
-            # Update the chat display
-            if self.parent_chat:
-                self.parent_chat.rebuild_chat_content()
-                self.parent_chat.update_chat_display()
+            # Only the new text is sent on the next render pass
+            self.mark_dirty()
 
         except Exception as e:
             print(f"Error in handle_response_chunk: {str(e)}")
@@ -166,12 +294,17 @@ class Message:
 
     def to_dict(self):
         """Convert message to dictionary format."""
-        return {
+        data = {
             "role": self.role,
             "content": self.content,
             "model": self.model,
             "id": self.id,
         }
+        if self.metrics:
+            data["metrics"] = self.metrics
+        if self.truncated:
+            data["truncated"] = self.truncated
+        return data
 
     @classmethod
     def from_dict(cls, data, parent_chat=None):
@@ -182,6 +315,8 @@ class Message:
             model=data.get("model"),
             message_id=data.get("id"),
         )
+        msg.metrics = data.get("metrics")
+        msg.truncated = data.get("truncated")
         msg.parent_chat = parent_chat  # Set the parent_chat reference
         return msg
 
@@ -279,23 +414,102 @@ class Bridge(QObject):
         print("regenerateMessage", message_id)
         self.parent_chat.messages[message_id].regenerate()
 
+    @pyqtSlot(str)
+    def continueMessage(self, message_id):
+        self.parent_chat.continue_message(message_id)
+
     @pyqtSlot(str)
     def editMessage(self, message_id):
         if DEBUG:
             print("editMessage", message_id)
         self.parent_chat.messages[message_id].start_edit()
 
+    @pyqtSlot(str)
+    def requestMessageBodies(self, message_ids):
+        self.parent_chat.provide_message_bodies(json.loads(message_ids))
+
+    @pyqtSlot()
+    def reportFirstRender(self):
+        self.parent_chat.handle_first_render()
 
-class ProviderStatusThread(QThread):
-    def __init__(self, settings_interface):
-        super().__init__()
-        self.settings_interface = settings_interface
 
-    def run(self):
-        self.settings_interface.reload_models()
+ASSET_SCHEME = "pixelllama-asset"
+
+
+def register_url_schemes():
+    """Register the chat view URL schemes, must run before QApplication is created."""
+    flags = (
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.LocalAccessAllowed
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+    )
+    for name, syntax in (
+        (IMAGE_SCHEME, QWebEngineUrlScheme.Syntax.Host),
+        (ASSET_SCHEME, QWebEngineUrlScheme.Syntax.Path),
+    ):
+        scheme = QWebEngineUrlScheme(name.encode())
+        scheme.setSyntax(syntax)
+        scheme.setFlags(flags)
+        QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class AssetSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Serve the vendored web assets from memory, preloaded when the chat view is built."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.assets = load_web_assets()
+        self.missing = sorted(set(WEB_ASSETS) - set(self.assets))
+        if self.missing:
+            # Until they are vendored the page loads them from their pinned CDN URL
+            print(
+                f"Missing vendored web assets: {', '.join(self.missing)}, loading them "
+                "from the network. Run python -m utils.web_assets to work offline."
+            )
+            for name, data in self.assets.items():
+                if name.endswith(".css"):
+                    css = link_missing_assets(data.decode("utf-8"), self.assets, ASSET_SCHEME)
+                    self.assets[name] = css.encode("utf-8")
+        elif DEBUG:
+            print(f"Preloaded {len(self.assets)} web assets")
+
+    def requestStarted(self, job):
+        name = job.requestUrl().path()
+        data = self.assets.get(name)
+        if data is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(get_asset_mime(name).encode(), buffer)
+
+
+class ImageSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Serve chat images by content key so render payloads only carry short URLs."""
+
+    def __init__(self, image_store, parent=None):
+        super().__init__(parent)
+        self.image_store = image_store
+
+    def requestStarted(self, job):
+        key = job.requestUrl().host()
+        data = self.image_store.get(key)
+        if data is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(guess_image_mime(data).encode(), buffer)
 
 
 class ChatBox(QWidget):
+    # Bodies sent along with a full render, older ones are fetched on demand
+    INITIAL_MESSAGE_BODIES = 20
+
     def __init__(self, parent=None, chat_instance=None):
         super().__init__(parent)
         self.parent = parent
@@ -304,15 +518,38 @@ class ChatBox(QWidget):
         # Initialize state
         self.is_online_tracker = False
         self.chat_instance = chat_instance
-        self.chat_content = []
         self.current_response = ""
         self.is_receiving = False
         self.current_editing_message = None
         self.provider_status_displayed = False
         self.chat_storage = ChatStorage()
+        self.image_store = ImageStore()
         self.active_model = None
         self.messages = OrderedDict()  # Messages are stored in an ordered dictionary
-        self.time_to_update_provider_status = 0
+        self.context_manager = ContextManager()  # Fits outgoing history to the model
+
+        # Render scheduler: mutations mark messages dirty, one pass per event-loop turn
+        self.dirty_message_ids = set()
+        self.full_render_pending = False
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(0)
+        self.render_timer.timeout.connect(self.render_pending)
+
+        # Streamed chunks are merged and delivered at most once per frame
+        self.chunk_coalescer = ChunkCoalescer(self)
+        self.chunk_coalescer.chunk_flushed.connect(self.handle_response_chunk)
+
+        # With -replay, recorded streams are played back instead of calling the provider
+        self.replay_settings = get_replay_settings()
+        self.replay_paths = []
+        self.replay_index = 0
+        self.frame_monitor = FrameMonitor(parent=self)
+        if self.replay_settings:
+            self.replay_paths = list_recordings(self.replay_settings[0])
+            if not self.replay_paths:
+                print(f"No stream recordings found at {self.replay_settings[0]}")
+
         self.initUI()
 
         # Load chat history into ordered dict
@@ -330,6 +567,13 @@ class ChatBox(QWidget):
             elif msg.role == "user":
                 previous_user_msg = msg
 
+        # Drop cached images of earlier conversations and enforce the cache limits
+        self.image_store.retain(self.get_image_keys(self.messages.values()))
+        self.image_store.enforce_limits()
+
+        # Load the model the next message will use before it is sent
+        self.chat_instance.model_warmer.warm(self.active_model or get_default_model())
+
     def initUI(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -337,6 +581,18 @@ class ChatBox(QWidget):
         # Chat display
         self.chat_display = QWebEngineView()
 
+        # Serve message images through the custom scheme instead of inline base64
+        self.image_scheme_handler = ImageSchemeHandler(self.image_store, self)
+        self.chat_display.page().profile().installUrlSchemeHandler(
+            IMAGE_SCHEME.encode(), self.image_scheme_handler
+        )
+
+        # Scripts, styles and fonts come from memory, no network needed
+        self.asset_scheme_handler = AssetSchemeHandler(self)
+        self.chat_display.page().profile().installUrlSchemeHandler(
+            ASSET_SCHEME.encode(), self.asset_scheme_handler
+        )
+
         layout.addWidget(self.chat_display, 1)
         self.initialize_chat_display()
 
@@ -349,19 +605,13 @@ class ChatBox(QWidget):
         # Connect the JavaScript bridge
         self.chat_display.page().loadFinished.connect(self.onLoadFinished)
 
-        # Check provider status when chat display loads and initialize timer
+        # Load the models and start monitoring the provider once the page is up
         self.chat_display.loadFinished.connect(
             lambda: self.chat_instance.settings_interface.reload_models(update_ui=True)
         )
-        self.chat_display.loadFinished.connect(
-            lambda: (
-                setattr(self, "provider_status_timer", QTimer()),
-                getattr(self, "provider_status_timer").timeout.connect(
-                    self.check_provider_status
-                ),
-                getattr(self, "provider_status_timer").start(1000),
-            )
-        )
+        health_monitor = self.chat_instance.health_monitor
+        health_monitor.status_changed.connect(self.handle_provider_status)
+        self.chat_display.loadFinished.connect(health_monitor.start)
 
     def initialize_chat_display(self):
         """Initializes the chat display with HTML template and app icon"""
@@ -377,6 +627,9 @@ class ChatBox(QWidget):
 
         # Replace the placeholder with the base64-encoded image
         initial_html = initial_html.replace("{{APP_ICON_BASE64}}", icon_base64)
+        initial_html = link_missing_assets(
+            initial_html, self.asset_scheme_handler.assets, ASSET_SCHEME
+        )
 
         self.chat_display.setHtml(initial_html)
 
@@ -444,17 +697,37 @@ class ChatBox(QWidget):
         message_ids = list(self.messages.keys())
         found_message = False
 
+        removed = []
         for msg_id in message_ids:
             if found_message:
-                del self.messages[msg_id]
+                removed.append(self.messages.pop(msg_id))
+                self.context_manager.forget([msg_id])
             if msg_id == message_id:
                 found_message = True
 
+        # Delete cached images only the removed messages referenced
+        kept = self.get_image_keys(self.messages.values())
+        self.image_store.forget(self.get_image_keys(removed) - kept)
+
+    def get_image_keys(self, messages):
+        """Return the image store keys of the data URL images in messages."""
+        keys = set()
+        for message in messages:
+            for item in message.content:
+                if item.get("type") == "image" and "image_url" in item:
+                    img_url = item["image_url"]["url"]
+                    if img_url.startswith("data:"):
+                        keys.add(self.image_store.key_for(img_url))
+        return keys
+
     def handle_response_chunk(self, chunk, message_id):
         """Route response chunks to appropriate message."""
         if isinstance(chunk, str) and chunk.startswith("Error:"):
-            # Set provider offline if request failed
-            self.chat_instance.provider_online = False
+            # Set provider offline if request failed, the monitor confirms with a probe
+            self.chat_instance.health_monitor.report_failure()
+        else:
+            # Streamed text is proof of life, no probe needed while it flows
+            self.chat_instance.health_monitor.report_success()
 
         if DEBUG:
             print("\n=== handle_response_chunk ===")
@@ -474,15 +747,61 @@ class ChatBox(QWidget):
                 )
                 new_msg.parent_chat = self
                 self.messages[new_msg.id] = new_msg
+                self.request_full_render()
             else:
                 self.current_response = chunk
                 last_msg = next(reversed(self.messages.values()))
                 last_msg.handle_response_chunk(self.current_response)
 
-        self.update_chat_display()
+    def handle_response_metrics(self, message_id, metrics):
+        """Store the metrics of a finished response and show them under it."""
+        record_metrics(metrics)
+        message = self.messages.get(message_id)
+        if message is not None:
+            self.set_message_metrics(message, metrics)
+
+    def set_message_metrics(self, message, metrics):
+        """Update the metrics of a message and its metrics line in the page."""
+        message.set_metrics(metrics)
+        self.chat_display.page().runJavaScript(
+            f"setMessageMetrics({json.dumps(message.id)}, {json.dumps(metrics)})"
+        )
 
-    def handle_response_complete(self):
+    def create_replay_request(self, message_id):
+        """Build a ReplayRequest for the next recording, cycling through them."""
+        path = self.replay_paths[self.replay_index % len(self.replay_paths)]
+        self.replay_index += 1
+        speed = self.replay_settings[1]
+        print(f"Replaying {path.name} at {f'{speed:g}x' if speed else 'full'} speed")
+        self.frame_monitor.start()
+        return ReplayRequest(load_recording(path), speed, message_id=message_id)
+
+    def report_replay(self, request):
+        """Print how fast the render pipeline consumed a replayed stream."""
+        frames = self.frame_monitor.stop()
+        if request.started is None:
+            return  # Stopped before the engine picked it up
+        coalescer = self.chunk_coalescer.get_stats()
+        elapsed = max(time.perf_counter() - request.started, 1e-6)
+        delivered = request.recording["chunks"][: request.delivered]
+        chunks = len(delivered)
+        chars = sum(len(text) for _, text in delivered)
+        print(
+            f"Replay {'cancelled' if request.cancelled else 'finished'} in {elapsed:.2f}s: "
+            f"{chunks / elapsed:.0f} chunks/s, {chars / elapsed:.0f} chars/s, "
+            f"{coalescer['flushes']} UI updates (max {coalescer['max_merged']} chunks merged), "
+            f"{frames['dropped_frames']} dropped frames, longest stall {frames['max_gap_ms']}ms"
+        )
+
+    def handle_response_complete(self, message_id=None):
         """Handle completion of Ollama response."""
+        # Deliver any buffered chunks before finalizing the message
+        self.chunk_coalescer.flush()
+        if DEBUG:
+            print(f"Stream coalescing stats: {self.chunk_coalescer.get_stats()}")
+            print(f"Connection reuse stats: {get_connection_stats()}")
+            print(f"Ollama endpoint pool: {get_endpoint_stats()}")
+
         if not self.current_response:
             self.current_response = "No response received from Assistant."
 
@@ -496,6 +815,16 @@ class ChatBox(QWidget):
         if last_msg and last_msg.role == "assistant":
             last_msg.model = current_model
 
+        # Send the remaining deltas, then let the page know the live message is final
+        self.render_pending()
+        request = self.chat_instance.provider_request
+        if isinstance(request, ReplayRequest):
+            self.report_replay(request)
+        if last_msg:
+            self.chat_display.page().runJavaScript(
+                f"finishMessageStream({json.dumps(message_id or last_msg.id)})"
+            )
+
         # Reset state
         self.current_response = ""
         self.is_receiving = False
@@ -504,47 +833,8 @@ class ChatBox(QWidget):
         self.chat_instance.send_btn.setObjectName("sendButton")
 
     def rebuild_chat_content(self):
-        """Reconstruct chat_content based on messages."""
-        DEBUG = False
-        if DEBUG:
-            print("\n=== rebuild_chat_content ===")
-            print("Current messages:")
-            for msg_id, msg in self.messages.items():
-                print(f"ID: {msg_id}")
-                print(f"Role: {msg.role}")
-                print(f"Content: {msg.get_text()[:100]}...")
-
-        self.chat_content = []
-
-        for message in self.messages.values():
-            if message.role == "system":
-                continue
-
-            # Ensure parent_chat reference is set
-            message.parent_chat = self
-
-            try:
-                sender = "user" if message.role == "user" else message.model
-                text_content = message.get_text()
-                images_html = ""
-
-                # Process images if any
-                for item in message.content:
-                    if item.get("type") == "image" and "image_url" in item:
-                        img_url = item["image_url"]["url"]
-                        images_html += f'<img src="{img_url}" alt="Screenshot" style="max-width: 100%; height: auto; margin: 10px 0; border-radius: 8px;">'
-
-                self.chat_content.append((sender, text_content, images_html))
-
-            except Exception as e:
-                if DEBUG:
-                    print(f"Error processing message: {str(e)}")
-                    print(f"Message content: {message}")
-
-        if DEBUG:
-            print("\nFinal chat_content length:", len(self.chat_content))
-
-        self.update_chat_display()
+        """Re-render the whole transcript from the messages."""
+        self.request_full_render()
 
     def handle_edit_start(self, message):
         """Handle when a message starts being edited."""
@@ -608,16 +898,17 @@ class ChatBox(QWidget):
         new_message.parent_chat = self
         self.messages[new_message.id] = new_message
 
-        # Update display and submit
-        self.rebuild_chat_content()
+        # Submit renders the new message along with the pending response
         self.save_chat_history()
         new_message.submit()
 
     def clear_chat(self):
-        self.chat_content.clear()
+        self.context_manager.forget(list(self.messages))
         self.messages.clear()
+        # Screenshots of the cleared conversation do not stay on disk
+        self.image_store.retain(())
         self.current_editing_message = None
-        self.update_chat_display()
+        self.request_full_render()
         self.chat_instance.input_field.clear()
         self.selected_screenshot = None
         self.chat_instance.screenshot_btn.setStyleSheet(
@@ -632,30 +923,14 @@ class ChatBox(QWidget):
         if DEBUG:
             print(f"JS Console ({level}): {message} [line {line}] {source}")
 
-    def check_provider_status(self):
-        """Check provider status and update UI accordingly."""
-        self.time_to_update_provider_status += 1
-        if self.time_to_update_provider_status > (
-            20 if self.chat_instance.provider_online else 5
-        ):
-            self.time_to_update_provider_status = 0
-            # if self.chat_instance.status_thread is None:
-            self.chat_instance.status_thread = ProviderStatusThread(
-                self.chat_instance.settings_interface
-            )
-            # self.chat_instance.status_thread.finished_cleanup.connect(self.cleanup_reload_thread)
-            self.chat_instance.status_thread.start()
-        self.handle_provider_status()
-
     def cleanup_reload_thread(self, thread):
         """Clean up the reload thread reference"""
         if hasattr(self, "reload_thread") and self.reload_thread == thread:
             self.reload_thread = None
 
-    def handle_provider_status(self):
-        """Handle the provider status results from the thread."""
-        # Update timer interval based on status
-        provider_online = self.chat_instance.provider_online
+    def handle_provider_status(self, provider_online, provider=""):
+        """Apply a provider status change reported by the health monitor."""
+        self.chat_instance.provider_online = provider_online
 
         if self.is_online_tracker != provider_online:  # Only update if state changed
             self.chat_instance.update_gradient_state()
@@ -665,18 +940,41 @@ class ChatBox(QWidget):
             if provider_online and len(self.messages) > 0:
                 self.rebuild_chat_content()
 
+            # The cached model list is stale after an outage
+            if provider_online:
+                self.chat_instance.settings_interface.reload_models()
+
         # Update local state
         self.is_online_tracker = provider_online
 
         # Update status in UI
-        status_message = {"provider": "Unknown", "online": provider_online}
+        status_message = {
+            "provider": provider.title() if provider else "Unknown",
+            "online": provider_online,
+        }
 
         self.chat_display.page().runJavaScript(
             f"updateProviderStatus({json.dumps(status_message)})"
         )
         self.chat_instance.send_btn.setEnabled(self.chat_instance.provider_online)
 
+    def get_startup_elapsed_ms(self):
+        """Milliseconds since the application started, if the start time is known."""
+        startup_time = getattr(self.chat_instance, "startup_time", None)
+        if startup_time is None:
+            return None
+        return (time.perf_counter() - startup_time) * 1000
+
+    def handle_first_render(self):
+        """Report the cold-start time to the first rendered transcript."""
+        elapsed_ms = self.get_startup_elapsed_ms()
+        if DEBUG and elapsed_ms is not None:
+            print(f"Time to first render: {elapsed_ms:.0f}ms after startup")
+
     def onLoadFinished(self, ok):
+        elapsed_ms = self.get_startup_elapsed_ms()
+        if DEBUG and elapsed_ms is not None:
+            print(f"Chat view loaded ({'ok' if ok else 'failed'}) {elapsed_ms:.0f}ms after startup")
         if ok:
             js = """
             new QWebChannel(qt.webChannelTransport, function(channel) {
@@ -695,11 +993,34 @@ class ChatBox(QWidget):
                         } else {
                             console.error('Bridge not initialized');
                         }
+                    },
+                    continueMessage: function(messageId) {
+                        if (window.bridge) {
+                            window.bridge.continueMessage(messageId);
+                        } else {
+                            console.error('Bridge not initialized');
+                        }
+                    },
+                    requestMessageBodies: function(messageIds) {
+                        if (window.bridge) {
+                            window.bridge.requestMessageBodies(messageIds);
+                        } else {
+                            console.error('Bridge not initialized');
+                        }
+                    },
+                    reportFirstRender: function() {
+                        if (window.bridge) {
+                            window.bridge.reportFirstRender();
+                        }
                     }
                 };
             });
             """
             self.chat_display.page().runJavaScript(js)
+            if self.asset_scheme_handler.missing:
+                self.chat_display.page().runJavaScript(
+                    f"showMissingAssets({json.dumps(self.asset_scheme_handler.missing)})"
+                )
 
     def regenerate_message(self, message_id):
         """Regenerate a specific message in the chat history."""
@@ -710,6 +1031,26 @@ class ChatBox(QWidget):
         else:
             print(f"Warning: Message {message_id} not found in chat history")
 
+    def continue_message(self, message_id):
+        """Resume a truncated answer instead of regenerating it."""
+        if message_id in self.messages:
+            self.messages[message_id].continue_response()
+        else:
+            print(f"Warning: Message {message_id} not found in chat history")
+
+    def set_message_truncated(self, message, reason):
+        """Update the truncation state of a message and its notice in the page."""
+        message.set_truncated(reason)
+        self.chat_display.page().runJavaScript(
+            f"setMessageTruncated({json.dumps(message.id)}, {json.dumps(reason)})"
+        )
+
+    def handle_response_truncated(self, message_id, reason):
+        """Keep a partial answer after the stream failed, it can be continued."""
+        message = self.messages.get(message_id)
+        if message is not None:
+            self.set_message_truncated(message, reason)
+
     def edit_message(self, message_id):
         """Start editing a message with the given ID."""
         print(f"\n=== edit_message ===")
@@ -746,94 +1087,189 @@ class ChatBox(QWidget):
 
                 traceback.print_exc()
 
+    def mark_message_dirty(self, message_id):
+        """Schedule a partial render for a single changed message."""
+        self.dirty_message_ids.add(message_id)
+        self.render_timer.start()
+
+    def request_full_render(self):
+        """Schedule a full rebuild of the chat display."""
+        self.full_render_pending = True
+        self.render_timer.start()
+
+    def render_pending(self):
+        """Render everything marked since the last pass, in a single update."""
+        self.render_timer.stop()
+        dirty_ids = self.dirty_message_ids
+        self.dirty_message_ids = set()
+
+        if self.full_render_pending:
+            self.full_render_pending = False
+            self.update_chat_display()
+            return
+
+        for message_id in dirty_ids:
+            message = self.messages.get(message_id)
+            if not message:
+                continue
+
+            text_length = message.get_text_length()
+            if message.needs_replace or text_length < message.rendered_length:
+                self.set_message_display_text(message_id, message.get_text())
+            elif text_length > message.rendered_length:
+                self.append_message_delta(
+                    message_id, message.get_text_from(message.rendered_length)
+                )
+            message.rendered_length = text_length
+            message.needs_replace = False
+
     def update_chat_display(self):
-        """Update the chat display with current content."""
+        """Update the chat display with current content.
+
+        The page only receives a lightweight index of all messages plus the
+        bodies of the most recent ones; older bodies are requested on demand
+        as the virtualized transcript scrolls them into view.
+        """
         DEBUG = False
         if DEBUG:
             print("\n=== update_chat_display ===")
 
-        chat_content = []
+        chat_index = []
+        bodies = []
 
-        # Check if messages is empty
-        if not self.messages:
-            if DEBUG:
-                print("Empty messages, clearing display")
-            self.chat_display.page().runJavaScript(
-                """
-                try {
-                    updateChatContent([]);
-                } catch (error) {
-                    console.error('Error updating chat content:', error);
-                }
-                """
-            )
-            return
+        # Skip system messages
+        visible_messages = [
+            message for message in self.messages.values() if message.role != "system"
+        ]
+        first_body_idx = len(visible_messages) - self.INITIAL_MESSAGE_BODIES
 
-        # Process messages if there are any
-        for idx, message in enumerate(self.messages.values()):
+        # Fragments are cached per message version, so unchanged messages are
+        # only joined here instead of being rebuilt and re-serialized
+        for idx, message in enumerate(visible_messages):
             try:
-                # Skip system messages
-                if message.role == "system":
-                    continue
-
-                sender = "user" if message.role == "user" else message.model
-                message_id = message.id
+                message.rendered_length = message.get_text_length()
+                message.needs_replace = False
 
-                if DEBUG:
-                    print(f"\nProcessing message {idx}:")
-                    print(f"Sender: {sender}")
-                    print(f"Content: {message.content}")
-
-                text_content = message.get_text()
-                images_html = ""
-
-                # Process images if any
-                for item in message.content:
-                    if item.get("type") == "image" and "image_url" in item:
-                        img_url = item["image_url"]["url"]
-                        images_html += f'<img src="{img_url}" alt="Screenshot" style="max-width: 128px; height: auto; margin: 10px 0; border-radius: 8px;">'
-
-                chat_content.append(
-                    {
-                        "sender": sender,
-                        "content": text_content,
-                        "images": images_html,
-                        "id": message_id,
-                    }
+                chat_index.append(
+                    message.get_render_fragment("index", self.get_message_index_entry)
                 )
-
-                if DEBUG:
-                    print(f"Added to chat_content - Text: {text_content[:50]}...")
-                    print(f"Has images: {'Yes' if images_html else 'No'}")
+                if idx >= first_body_idx:
+                    bodies.append(
+                        message.get_render_fragment("body", self.get_message_payload)
+                    )
 
             except Exception as e:
                 if DEBUG:
                     print(f"Error processing message {idx}: {str(e)}")
                     print(f"Message content: {message}")
 
+        if DEBUG:
+            print(f"Indexed {len(chat_index)} messages, sent {len(bodies)} bodies")
+
         # Update the chat container content
         self.chat_display.page().runJavaScript(
             f"""
             try {{
-                updateChatContent({json.dumps(chat_content)});
+                updateChatContent([{",".join(chat_index)}], [{",".join(bodies)}]);
             }} catch (error) {{
                 console.error('Error updating chat content:', error);
             }}
             """
         )
 
+    def get_message_index_entry(self, message):
+        """Build the lightweight index entry the virtualized page sizes messages with."""
+        return {
+            "id": message.id,
+            "length": message.get_text_length(),
+            "images": sum(1 for item in message.content if item.get("type") == "image"),
+        }
+
+    def get_message_payload(self, message):
+        """Build the render payload the page needs to display a message."""
+        sender = "user" if message.role == "user" else message.model
+        images = []
+
+        # Images are referenced by content key and served by ImageSchemeHandler
+        for item in message.content:
+            if item.get("type") == "image" and "image_url" in item:
+                img_url = item["image_url"]["url"]
+                if img_url.startswith("data:"):
+                    img_url = self.image_store.url_for(img_url)
+                images.append(img_url)
+
+        return {
+            "sender": sender,
+            "content": message.get_text(),
+            "images": images,
+            "id": message.id,
+            "metrics": message.metrics,
+            "truncated": message.truncated,
+        }
+
+    def provide_message_bodies(self, message_ids):
+        """Send the bodies the virtualized page asked for."""
+        bodies = [
+            self.messages[message_id].get_render_fragment(
+                "body", self.get_message_payload
+            )
+            for message_id in message_ids
+            if message_id in self.messages
+        ]
+        if not bodies:
+            return
+
+        self.chat_display.page().runJavaScript(
+            f"""
+            try {{
+                receiveMessageBodies([{",".join(bodies)}]);
+            }} catch (error) {{
+                console.error('Error receiving message bodies:', error);
+            }}
+            """
+        )
+
+    def append_message_delta(self, message_id, delta):
+        """Append a streamed delta to a single message node without a full rebuild."""
+        self.chat_display.page().runJavaScript(
+            f"""
+            try {{
+                appendMessageDelta({json.dumps(message_id)}, {json.dumps(delta)});
+            }} catch (error) {{
+                console.error('Error appending message delta:', error);
+            }}
+            """
+        )
+
+    def set_message_display_text(self, message_id, text):
+        """Replace the displayed text of a single message node."""
+        self.chat_display.page().runJavaScript(
+            f"""
+            try {{
+                setMessageText({json.dumps(message_id)}, {json.dumps(text)});
+            }} catch (error) {{
+                console.error('Error setting message text:', error);
+            }}
+            """
+        )
+
     def get_messages_for_request(self, up_to_message_id=None):
-        """Get messages formatted for provider request, optionally up to a specific message."""
-        messages_to_send = []
+        """Get messages formatted for provider request, optionally up to a specific message.
+
+        The history is trimmed to the token budget of the model it is sent to.
+        """
+        history = []
 
         for msg_id, msg in self.messages.items():
-            # Create a copy of the message content
-            message_data = msg.to_dict()
-            messages_to_send.append(message_data)
+            history.append(msg)
             if msg_id == up_to_message_id:
                 break
 
-        return messages_to_send
+        return self.context_manager.fit(
+            history,
+            self.active_model or get_default_model(),
+            self.chat_instance.settings_interface.context_size,
+        )
 
     def start_provider_request(self, messages, screenshots=None, message_id=None):
         """Unified method to start a provider request."""
@@ -852,6 +1288,8 @@ class ChatBox(QWidget):
             # If not a vision model, remove all image content from messages
             if not is_vision_model:
                 for message in messages:
+                    if not isinstance(message["content"], list):
+                        continue
                     message["content"] = [
                         item
                         for item in message["content"]
@@ -859,19 +1297,28 @@ class ChatBox(QWidget):
                     ]
                 screenshots = []  # Clear images for non-vision models
 
-            self.chat_instance.provider_request_thread = ProviderRequest(
-                messages,
-                screenshots,
-                model,
-                message_id=message_id,
-                temperature=self.chat_instance.settings_interface.temperature,
-                context_size=self.chat_instance.settings_interface.context_size,
-            )
+            if self.replay_paths:
+                self.chat_instance.provider_request = self.create_replay_request(message_id)
+            else:
+                self.chat_instance.provider_request = ProviderRequest(
+                    messages,
+                    screenshots,
+                    model,
+                    message_id=message_id,
+                    temperature=self.chat_instance.settings_interface.temperature,
+                    context_size=self.chat_instance.settings_interface.context_size,
+                )
 
-            thread = self.chat_instance.provider_request_thread
-            thread.response_chunk_ready.connect(self.handle_response_chunk)
-            thread.response_complete.connect(self.handle_response_complete)
-            thread.start()
+            request = self.chat_instance.provider_request
+            # Push chunks straight from the engine's I/O thread into the coalescer
+            self.chunk_coalescer.reset_stats()
+            request.response_chunk_ready.connect(
+                self.chunk_coalescer.push, Qt.ConnectionType.DirectConnection
+            )
+            request.metrics_ready.connect(self.handle_response_metrics)
+            request.response_truncated.connect(self.handle_response_truncated)
+            request.response_complete.connect(self.handle_response_complete)
+            request.start()
 
             # Update UI state
             self.is_receiving = True
@@ -157,12 +157,12 @@ class PromptBox(QTextEdit):
 
     def _update_suggestion_list(self):
         """Actual update of suggestion list with debouncing."""
-        if not hasattr(self.chat_instance.settings_interface, 'model_names'):
+        if not hasattr(self.chat_instance, 'model_catalog'):
             return
         
         self.suggestion_list.clear()
         filtered_models = [
-            model for model in self.chat_instance.settings_interface.model_names 
+            model for model in self.chat_instance.model_catalog.snapshot()
             if self._current_search.lower() in model.lower()
         ]
 
@@ -226,5 +226,8 @@ class PromptBox(QTextEdit):
             cursor.setPosition(len(new_text))
             self.setTextCursor(cursor)
 
+            # Load the picked model while the prompt is still being typed
+            self.chat_instance.model_warmer.warm(item.text())
+
         self.suggestion_list.hide()
         self.setFocus()
\ No newline at end of file
@@ -20,7 +20,6 @@ from PyQt6.QtWidgets import (
     QDialog,
     QGridLayout,
     QComboBox,
-    QApplication,
 )
 from PyQt6.QtGui import (
     QDoubleValidator,
@@ -31,9 +30,9 @@ from PyQt6.QtGui import (
 )
 from utils.provider_utils import (
     get_ollama_url,
-    request_models,
     get_openai_url,
 )
+from utils.connection_manager import connection_manager
 
 DEBUG = "-debug" in sys.argv
 
@@ -84,6 +83,12 @@ class SettingsPage(QWidget):
         self.theme = self.settings.get("theme", "dark")
         self.model_names = []
 
+        # The list widget follows the shared catalog, rebuilt only on changes
+        self.chat_instance.model_catalog.models_changed.connect(
+            self.on_catalog_models_changed
+        )
+        self.chat_instance.model_catalog.refreshed.connect(self.on_catalog_refreshed)
+
         self.setWindowTitle("Settings")
         self.setGeometry(100, 100, 400, 300)
 
@@ -421,6 +426,12 @@ class SettingsPage(QWidget):
         self.current_theme = self.theme_combo.currentText()
         self.update_theme(self.current_theme)
 
+        # Endpoints may have changed, cached lists and status can't be trusted anymore
+        connection_manager.reset()  # New sessions pick up pool size, keep-alive and timeouts
+        self.chat_instance.model_catalog.invalidate()
+        self.reload_models(update_ui=True)
+        self.chat_instance.health_monitor.check_now()
+
         self.load_settings()
         self.chat_instance.toggle_settings()
 
@@ -450,41 +461,66 @@ class SettingsPage(QWidget):
         self.chat_instance.chat_box.update_webview_colors()
 
     def reload_models(self, update_ui=False):
-        """Reload the model list"""
-        try:
-            # Force update of the UI
-            QApplication.processEvents()
-
-            # Now load new models
-            self.model_names = []
-            self.model_names = sorted(
-                request_models(self.provider_combo.currentText().lower())
-            )
+        """Refresh the model list in the background.
+
+        With update_ui the cached list is shown right away and a fetch is
+        forced, otherwise the catalog only fetches once its TTL expired.
+        """
+        provider = self.provider_combo.currentText().lower()
+        if update_ui:
+            self.show_model_snapshot(provider)
+        return self.chat_instance.model_catalog.refresh(provider, force=update_ui)
+
+    def show_model_snapshot(self, provider):
+        """Show the cached list of provider, if it differs from the displayed one."""
+        model_names = self.chat_instance.model_catalog.snapshot(provider)
+        if model_names != self.model_names:
+            self.model_names = model_names
+            self.rebuild_model_list()
+
+    def on_catalog_models_changed(self, provider, model_names):
+        if provider == self.provider_combo.currentText().lower():
+            self.model_names = model_names
+            self.rebuild_model_list()
+
+    def on_catalog_refreshed(self, provider, reachable):
+        # Only a listing that reached the server is proof of life, failures are left to the probes
+        if provider != self.provider_combo.currentText().lower():
+            return
+        if reachable:
+            self.chat_instance.health_monitor.report_success()
+        elif not self.model_names:
+            self.rebuild_model_list()  # Show why there is nothing to list
+
+    def rebuild_model_list(self):
+        """Recreate the model list widgets from model_names."""
+        # Clear existing items and their widgets
+        while self.model_list.count() > 0:
+            item = self.model_list.takeItem(0)
+            widget = self.model_list.itemWidget(item)
+            if widget:
+                widget.deleteLater()
+            del item
 
-            if update_ui:
-                self.setCursor(Qt.CursorShape.WaitCursor)
-
-                # Clear existing items and their widgets
-                while self.model_list.count() > 0:
-                    item = self.model_list.takeItem(0)
-                    widget = self.model_list.itemWidget(item)
-                    if widget:
-                        widget.deleteLater()
-                    del item
-
-                self.model_list.clear()  # Ensure list is visually cleared
-                self.update_list()
-        finally:
-            self.chat_instance.provider_online = not self.model_names[0] in [
-                "Error loading models"
-            ]
-            if update_ui:
-                self.setCursor(Qt.CursorShape.ArrowCursor)
+        self.model_list.clear()  # Ensure list is visually cleared
+        self.update_list()
 
     def update_list(self):
         """Load models based on selected provider"""
         self.model_list.clear()
 
+        if not self.model_names:
+            # Say why the list is empty, failed fetches are never cached as models
+            provider = self.provider_combo.currentText().lower()
+            catalog = self.chat_instance.model_catalog
+            notice = catalog.get_error(provider) or (
+                "No models found" if catalog.is_reachable(provider) else ""
+            )
+            if notice:
+                item = QListWidgetItem(notice, self.model_list)
+                item.setFlags(Qt.ItemFlag.NoItemFlags)
+            return
+
         # Create items with fixed button positions
         for model_name in self.model_names:
             item = QListWidgetItem(self.model_list)
@@ -568,6 +604,7 @@ class SettingsPage(QWidget):
             self.openai_default_model = model_name
 
         self.selected_model = model_name
+        self.chat_instance.model_warmer.warm(model_name)
 
         # Update all default buttons
         for i in range(self.model_list.count()):
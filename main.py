@@ -5,12 +5,13 @@
 
 import os
 import sys
+import time
 from pathlib import Path
 from math import cos, sin, radians
 from gui.settings import SettingsPage, get_base_model_name, load_svg_button_icon
 from gui.prompt_box import PromptBox
 from utils.chat_storage import ChatStorage
-from gui.chat_box import ChatBox
+from gui.chat_box import ChatBox, register_url_schemes
 from utils.settings_manager import load_settings_from_file
 from PyQt6.QtWidgets import (
     QApplication,
@@ -49,17 +50,24 @@ from PyQt6.QtGui import (
 )
 
 from utils.screenshot_utils import ScreenshotSelector, process_image
-from utils.provider_utils import request_models
+from utils.provider_engine import shutdown_provider_engine
+from utils.model_catalog import ModelCatalog
+from utils.health_monitor import HealthMonitor
+from utils.model_warmer import ModelWarmer
 from utils.settings_manager import get_default_model
 
 DEBUG = "-debug" in sys.argv
+STARTUP_TIME = time.perf_counter()
 
 
 class PixelChat(QWidget):
+    # Longest time stop_receiving waits for a cancelled request to go idle
+    STOP_TIMEOUT = 2.0
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.ICONS = Path() / "icons"
+        self.startup_time = STARTUP_TIME  # Used for the -debug time-to-first-render report
         screen = QApplication.primaryScreen().availableGeometry()
 
         # Add thumbnail size constants
@@ -104,7 +112,10 @@ class PixelChat(QWidget):
         self.dragging = False
         self.drag_start_position = None
         self.current_response_model = None
-        self.status_thread = None
+        self.provider_request = None  # Current ProviderRequest on the provider engine
+        self.model_catalog = ModelCatalog(self)  # Cached model lists, read by the UI
+        self.health_monitor = HealthMonitor(self)  # Sole source of provider_online
+        self.model_warmer = ModelWarmer(self)  # Keeps the active Ollama model loaded
 
         # Prompt box
         self.input_field = PromptBox(self, chat_instance=self)
@@ -120,13 +131,8 @@ class PixelChat(QWidget):
         self.create_tray_icon()
 
         # Load chat history
-        self.chat_content = []
         self.chat_storage = ChatStorage()
 
-        # Add provider status check timer
-        self.provider_check_timer = QTimer(self)
-        self.provider_check_timer.timeout.connect(self.chat_box.check_provider_status)
-        self.provider_check_timer.start(30000)  # 30 seconds as default
         self.provider_status_displayed = False
 
         # Add these new attributes for multiple images
@@ -243,7 +249,6 @@ class PixelChat(QWidget):
 
         # Update references
         self.chat_display = self.chat_box.chat_display
-        self.chat_content = self.chat_box.chat_content
 
         # Add size grip for resizing at the top-left
         size_grip = QSizeGrip(self)
@@ -527,7 +532,7 @@ class PixelChat(QWidget):
         if message.startswith("@"):
             parts = message.split(" ", 1)
             model_name = parts[0][1:]
-            available_models = request_models()
+            available_models = self.model_catalog.snapshot()
             if model_name in available_models:
                 model_to_use = model_name
                 message = parts[1] if len(parts) > 1 else ""
@@ -537,6 +542,8 @@ class PixelChat(QWidget):
         # If no model was specified with @, use active_model or default
         if model_to_use is None:
             model_to_use = self.chat_box.active_model or get_default_model()
+        # The request itself loads the model, only keep it resident afterwards
+        self.model_warmer.keep_resident(model_to_use)
 
         # Prepare content
         content = []
@@ -772,17 +779,27 @@ class PixelChat(QWidget):
         self.input_field.setPlaceholderText("Type your message...")
 
     def stop_receiving(self):
-        if self.provider_request_thread.isRunning():
-            self.provider_request_thread.terminate()
-            self.provider_request_thread.wait()
+        request = self.provider_request
+        if request and request.isRunning():
+            start = time.perf_counter()
+            # Closes the connection, so the server stops generating as well
+            request.cancel()
+            stopped = request.wait(self.STOP_TIMEOUT)
+            if DEBUG or not stopped:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                state = "stopped" if stopped else "still running"
+                print(f"Provider request {state} {elapsed_ms:.0f}ms after cancel")
+        # Keep whatever was streamed so far as the final answer
         self.chat_box.handle_response_complete()
         self.chat_box.rebuild_chat_content()
+        self.chat_box.save_chat_history()
         self.chat_box.is_receiving = False
         self.send_btn.setObjectName("sendButton")
         load_svg_button_icon(self.send_btn, self.ICONS / "send.svg")
 
     def terminate_application(self):
         self.tray_icon.hide()
+        shutdown_provider_engine()
         QApplication.quit()
 
     def create_tray_icon(self):
@@ -1119,6 +1136,7 @@ class PixelChat(QWidget):
 
 
 if __name__ == "__main__":
+    register_url_schemes()
     app = QApplication(sys.argv)
     ex = PixelChat()
     ex.show()
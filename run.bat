@@ -34,6 +34,9 @@ if defined need_install (
     pip install -r requirements.txt
 )
 
+:: Vendor the chat view assets on the first online launch, later launches work offline
+python -m utils.web_assets
+
 :: Run the Python script using pythonw
 echo Running...
 start "" pythonw main.py %*
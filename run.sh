@@ -33,6 +33,9 @@ if [ -n "$need_install" ]; then
     pip install -r "$REQUIREMENTS_FILE"
 fi
 
+# Vendor the chat view assets on the first online launch, later launches work offline
+python -m utils.web_assets
+
 # Run the Python script using python
 echo "Running PixelLlama..."
 python main.py "$@"
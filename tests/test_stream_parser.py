@@ -0,0 +1,52 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from utils.stream_parser import iter_openai_content, iter_response_chunks
+
+FIRST_LINE = b'data: {"choices":[{"delta":{"content":"Hello"}}]}\n\n'
+LAST_LINES = b'data: {"choices":[{"delta":{"content":" world"}}]}\n\ndata: [DONE]\n\n'
+PAUSE_S = 1.0
+
+
+class SlowSSEHandler(BaseHTTPRequestHandler):
+    """Stream SSE the way some servers do, without chunked encoding or a length."""
+
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(FIRST_LINE)
+        self.wfile.flush()
+        time.sleep(PAUSE_S)
+        self.wfile.write(LAST_LINES)
+
+
+def serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowSSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_unchunked_stream_yields_before_it_ends():
+    server = serve()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        with requests.get(url, stream=True, timeout=5) as response:
+            assert "Transfer-Encoding" not in response.headers
+            started = time.perf_counter()
+            stats = {}
+            content = iter_openai_content(iter_response_chunks(response, stats))
+            assert next(content) == "Hello"
+            assert time.perf_counter() - started < PAUSE_S / 2
+            assert list(content) == [" world"]
+        assert stats["bytes_received"] == len(FIRST_LINE) + len(LAST_LINES)
+    finally:
+        server.shutdown()
+        server.server_close()
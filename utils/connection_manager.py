@@ -0,0 +1,170 @@
+import socket
+import sys
+import threading
+import weakref
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from utils.settings_manager import get_http_settings
+
+DEBUG = "-debug" in sys.argv
+
+
+def _counting_pool_class(base, on_new_connection):
+    """Subclass a urllib3 connection pool to report every socket it opens.
+
+    Counted at connect(), a pooled connection whose socket was closed by a
+    cancel or a dropped stream reconnects without a new connection object.
+    on_new_connection receives the connection.
+    """
+
+    class CountingConnection(base.ConnectionCls):
+        def connect(self):
+            on_new_connection(self)
+            return super().connect()
+
+    class CountingPool(base):
+        ConnectionCls = CountingConnection
+
+    return CountingPool
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools call on_new_connection for each socket they open."""
+
+    def __init__(self, on_new_connection, **kwargs):
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_class, self._on_new_connection)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+class ConnectionManager:
+    """Hold one pooled keep-alive session per provider endpoint.
+
+    Status checks, model listing and chat streaming all go through the same
+    session for an endpoint, so they share warm connections instead of paying
+    a new TCP/TLS handshake on every call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}  # endpoint -> requests.Session
+        self._request_counts = {}  # endpoint -> requests sent
+        self._connection_counts = {}  # endpoint -> sockets opened
+        self._connections = weakref.WeakSet()  # Every connection object, for abort_all()
+        self._settings = None
+
+    def get_session(self, url):
+        """Return the pooled session for the endpoint serving url."""
+        endpoint = self._endpoint(url)
+        with self._lock:
+            session = self._sessions.get(endpoint)
+            if session is None:
+                session = self._create_session(endpoint)
+                self._sessions[endpoint] = session
+                self._request_counts[endpoint] = 0
+                self._connection_counts[endpoint] = 0
+                if DEBUG:
+                    print(f"Created pooled session for {endpoint}")
+            return session
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the endpoint's pooled session."""
+        session = self.get_session(url)
+        settings = self._settings or get_http_settings()
+        kwargs.setdefault(
+            "timeout", (settings["connect_timeout"], settings["read_timeout"])
+        )
+        with self._lock:
+            endpoint = self._endpoint(url)
+            self._request_counts[endpoint] = self._request_counts.get(endpoint, 0) + 1
+        return session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def get_stats(self):
+        """Return per-endpoint request and connection counters.
+
+        "connections" counts the sockets opened, including reconnects after a
+        cancel or a dropped stream, "reused" the requests that were served by
+        an already open connection.
+        """
+        stats = {}
+        with self._lock:
+            for endpoint in self._sessions:
+                connections = self._connection_counts.get(endpoint, 0)
+                requests_sent = self._request_counts.get(endpoint, 0)
+                stats[endpoint] = {
+                    "requests": requests_sent,
+                    "connections": connections,
+                    "reused": max(0, requests_sent - connections),
+                }
+        return stats
+
+    def reset(self):
+        """Close every session, e.g. after the connection settings changed."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._request_counts = {}
+            self._connection_counts = {}
+            self._settings = None
+
+    def abort_all(self):
+        """Shut down every open socket, so reads blocked on other threads return at once."""
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            sock = getattr(connection, "sock", None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _count_connection(self, endpoint, connection):
+        with self._lock:
+            self._connection_counts[endpoint] = self._connection_counts.get(endpoint, 0) + 1
+            self._connections.add(connection)
+
+    def _create_session(self, endpoint):
+        if self._settings is None:
+            self._settings = get_http_settings()
+        settings = self._settings
+
+        session = requests.Session()
+        adapter = CountingAdapter(
+            lambda connection: self._count_connection(endpoint, connection),
+            pool_connections=settings["pool_size"],
+            pool_maxsize=settings["pool_size"],
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not settings["keep_alive"]:
+            session.headers["Connection"] = "close"
+        return session
+
+    @staticmethod
+    def _endpoint(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+
+connection_manager = ConnectionManager()
+
+
+def get_connection_stats():
+    """Return the connection reuse stats of the shared connection manager."""
+    return connection_manager.get_stats()
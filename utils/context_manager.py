@@ -0,0 +1,209 @@
+import sys
+from utils.runtime_options import get_runtime_options
+from utils.settings_manager import (
+    get_context_budget_settings,
+    get_context_image_turns,
+    get_provider,
+    get_system_prompt,
+)
+
+DEBUG = "-debug" in sys.argv
+
+# Rough cost of one image in the prompt, vision encoders use a few hundred tokens
+IMAGE_TOKENS = 768
+# Per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+STALE_IMAGE_PLACEHOLDER = "[image from an earlier turn omitted]"
+DUPLICATE_IMAGE_PLACEHOLDER = "[same image as attached later in the conversation]"
+
+
+def estimate_text_tokens(text):
+    """Estimate tokens for text without a tokenizer, about 4 characters per token."""
+    return (len(text) + 3) // 4
+
+
+def measure_content(content):
+    """Return (text tokens, image count) of a message content list or string."""
+    if isinstance(content, str):
+        return estimate_text_tokens(content) + MESSAGE_OVERHEAD_TOKENS, 0
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    images = 0
+    for item in content:
+        if item.get("type") == "text":
+            tokens += estimate_text_tokens(item.get("text", ""))
+        elif item.get("type") == "image":
+            images += 1
+    return tokens, images
+
+
+def elide_images(request_messages, keep_images):
+    """Replace stale and duplicate images with short text placeholders.
+
+    keep_images holds one flag per request message, images in unflagged
+    messages are stale. Of identical images only the newest copy is sent.
+    Returns (stale count, duplicate count, bytes saved). Content lists are
+    copied, the chat's own messages are never modified.
+    """
+    stale = duplicates = saved = 0
+    seen = set()  # Image URLs already kept, str hashes are cached by Python
+    for index in range(len(request_messages) - 1, -1, -1):
+        message = request_messages[index]
+        content = message["content"]
+        if not isinstance(content, list):
+            continue
+        if not any(item.get("type") == "image" for item in content):
+            continue
+
+        new_content = []
+        for item in content:
+            if item.get("type") != "image":
+                new_content.append(item)
+                continue
+            url = item.get("image_url", {}).get("url", "")
+            if not keep_images[index]:
+                placeholder = STALE_IMAGE_PLACEHOLDER
+                stale += 1
+            elif url in seen:
+                placeholder = DUPLICATE_IMAGE_PLACEHOLDER
+                duplicates += 1
+            else:
+                seen.add(url)
+                new_content.append(item)
+                continue
+            saved += len(url)
+            new_content.append({"type": "text", "text": placeholder})
+        request_messages[index] = {**message, "content": new_content}
+    return stale, duplicates, saved
+
+
+class ContextManager:
+    """Fit the outgoing history into a token budget derived from the model's context.
+
+    The system prompt, system messages and the newest turns are kept; older
+    turns in the middle are dropped and replaced by a short note. Images are
+    only sent for the last context_image_turns user turns. Token estimates
+    are cached per message and version, so only edited or streamed messages
+    are re-counted.
+    """
+
+    def __init__(self):
+        self._estimates = {}  # message id -> (version, text tokens, image count)
+        self.last_report = None
+
+    def estimate(self, message, keep_images=True):
+        """Return the cached token estimate of a Message."""
+        cached = self._estimates.get(message.id)
+        if cached is None or cached[0] != message.version:
+            cached = (message.version, *measure_content(message.content))
+            self._estimates[message.id] = cached
+        _, tokens, images = cached
+        if keep_images:
+            return tokens + images * IMAGE_TOKENS
+        return tokens + images * estimate_text_tokens(STALE_IMAGE_PLACEHOLDER)
+
+    def get_budget(self, model, context_size=None):
+        """Return the prompt token budget for model, or None when unlimited."""
+        settings = get_context_budget_settings()
+        if settings["budget_tokens"]:
+            return settings["budget_tokens"]
+
+        num_ctx = get_runtime_options(model, context_size).get("num_ctx")
+        if not num_ctx:
+            if get_provider() != "ollama":
+                return None  # Hosted models have large windows, only trim when configured
+            num_ctx = settings["default_context_size"]
+        # Leave the rest of the window for the response
+        return int(num_ctx * settings["ratio"])
+
+    def fit(self, messages, model, context_size=None):
+        """Return the request dicts of messages trimmed to the budget.
+
+        messages are Message objects in conversation order, the last one is
+        the turn being answered and is always kept.
+        """
+        budget = self.get_budget(model, context_size)
+        system_messages = [m for m in messages if m.role == "system"]
+        history = [m for m in messages if m.role != "system"]
+
+        # Images are only worth re-sending for the most recent user turns
+        image_turns = get_context_image_turns()
+        user_positions = [i for i, m in enumerate(history) if m.role == "user"]
+        if image_turns <= 0:
+            images_from = len(history)
+        elif len(user_positions) > image_turns:
+            images_from = user_positions[-image_turns]
+        else:
+            images_from = 0
+        keeps_images = {m.id: i >= images_from for i, m in enumerate(history)}
+
+        system_prompt = get_system_prompt()
+        used = estimate_text_tokens(system_prompt or "") + sum(
+            self.estimate(m) for m in system_messages
+        )
+        kept = []
+        for index in range(len(history) - 1, -1, -1):
+            message = history[index]
+            tokens = self.estimate(message, keeps_images[message.id])
+            if budget is not None and kept and used + tokens > budget:
+                break
+            kept.append(message)
+            used += tokens
+        kept.reverse()
+
+        # Never start the kept history with an orphaned assistant reply
+        while len(kept) > 1 and kept[0].role == "assistant":
+            message = kept.pop(0)
+            used -= self.estimate(message, keeps_images[message.id])
+
+        dropped = history[: len(history) - len(kept)]
+        self.last_report = {
+            "budget": budget,
+            "estimated_tokens": used,
+            "kept_messages": len(kept),
+            "dropped_messages": len(dropped),
+            "dropped_tokens": sum(self.estimate(m) for m in dropped),
+        }
+        if dropped:
+            print(
+                f"Context: dropped {len(dropped)} older message(s), "
+                f"~{self.last_report['dropped_tokens']} tokens, "
+                f"to fit ~{used} of {budget} tokens"
+            )
+        elif DEBUG:
+            print(f"Context: ~{used} tokens of {budget or 'unlimited'}")
+
+        request_messages = [m.to_dict() for m in system_messages]
+        keep_flags = [True] * len(system_messages)
+        if dropped:
+            # The request only adds the system prompt when no system message leads
+            if not request_messages and system_prompt:
+                request_messages.append({"role": "system", "content": system_prompt})
+            request_messages.append(
+                {
+                    "role": "system",
+                    "content": (
+                        f"{len(dropped)} earlier messages of this conversation "
+                        "were omitted to fit the context window."
+                    ),
+                }
+            )
+        keep_flags += [True] * (len(request_messages) - len(keep_flags))
+        request_messages.extend(m.to_dict() for m in kept)
+        keep_flags.extend(keeps_images[m.id] for m in kept)
+
+        stale, duplicates, saved = elide_images(request_messages, keep_flags)
+        self.last_report.update(
+            stale_images=stale, duplicate_images=duplicates, image_bytes_saved=saved
+        )
+        if stale or duplicates:
+            print(
+                f"Images: omitted {stale} stale and {duplicates} duplicate image(s), "
+                f"{saved / 1024:.0f} KB less payload"
+            )
+        return request_messages
+
+    def forget(self, message_ids):
+        """Drop cached estimates of removed messages."""
+        for message_id in message_ids:
+            self._estimates.pop(message_id, None)
@@ -0,0 +1,253 @@
+import statistics
+import sys
+import threading
+import time
+import requests
+from utils.connection_manager import connection_manager
+from utils.settings_manager import get_health_settings, get_ollama_endpoints
+
+DEBUG = "-debug" in sys.argv
+
+# Assumed decode speed of a node nothing was measured on yet
+DEFAULT_TOKENS_PER_S = 30.0
+# Assumed load time of a model that is not resident on a node
+DEFAULT_LOAD_S = 10.0
+# Response length the routing estimate is based on
+TYPICAL_RESPONSE_TOKENS = 256
+# Weight of the newest sample in the moving averages
+EWMA_WEIGHT = 0.3
+
+
+def normalize_model_name(model):
+    """Ollama treats "llama3" and "llama3:latest" as the same model."""
+    return model if not model or ":" in model else f"{model}:latest"
+
+
+def _ewma(previous, sample):
+    if sample is None:
+        return previous
+    if previous is None:
+        return sample
+    return previous + EWMA_WEIGHT * (sample - previous)
+
+
+class EndpointState:
+    """What the pool knows about one Ollama node."""
+
+    def __init__(self, url):
+        self.url = url
+        self.healthy = True  # Optimistic until a probe or request says otherwise
+        self.failures = 0
+        self.down_until = 0.0  # monotonic time before which the node is skipped
+        self.in_flight = 0  # Requests currently streaming from the node
+        self.models = None  # Installed model names, None until listed
+        self.loaded = set()  # Models resident in memory
+        self.tokens_per_s = None  # Moving averages of the measured responses
+        self.ttft_s = None
+        self.load_s = None
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "models": len(self.models) if self.models is not None else None,
+            "loaded": sorted(self.loaded),
+            "tokens_per_s": round(self.tokens_per_s, 1) if self.tokens_per_s else None,
+            "ttft_s": round(self.ttft_s, 3) if self.ttft_s else None,
+        }
+
+
+class EndpointPool:
+    """Route Ollama requests across the configured nodes.
+
+    Each node's health, in-flight requests, installed and loaded models and
+    measured speed are tracked. choose() picks the node expected to finish a
+    typical response first, preferring nodes that already have the model in
+    memory. Failed nodes are skipped with exponential backoff and tried
+    again once it expires, so traffic fails over and comes back on its own.
+    With a single configured URL every call resolves to that URL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}  # url -> EndpointState, in configured order
+
+    def sync(self):
+        """Pick up the configured endpoints, keeping what is known about existing ones."""
+        urls = get_ollama_endpoints()
+        with self._lock:
+            if list(self._endpoints) != urls:
+                self._endpoints = {
+                    url: self._endpoints.get(url) or EndpointState(url) for url in urls
+                }
+            return urls
+
+    def get_urls(self):
+        with self._lock:
+            return list(self._endpoints)
+
+    def _expected_time(self, state, model, default_rate):
+        rate = state.tokens_per_s or default_rate
+        estimate = (state.ttft_s or 0.0) + (state.in_flight + 1) * TYPICAL_RESPONSE_TOKENS / rate
+        if model not in state.loaded:
+            estimate += state.load_s or DEFAULT_LOAD_S
+        return estimate
+
+    def choose(self, model, exclude=()):
+        """Return the URL of the best node for model, skipping the URLs in exclude.
+
+        Returns None when no Ollama URL is configured.
+        """
+        self.sync()
+        model = normalize_model_name(model)
+        now = time.monotonic()
+        with self._lock:
+            states = [s for s in self._endpoints.values() if s.url not in exclude]
+            if not states:
+                states = list(self._endpoints.values())
+            if not states:
+                return None
+            if len(states) == 1:
+                return states[0].url
+
+            # Down nodes get another chance once their backoff expired
+            available = [s for s in states if s.healthy or s.down_until <= now]
+            if not available:
+                return min(states, key=lambda s: s.down_until).url
+            # Nodes that were never listed may have the model, listed ones must
+            with_model = [s for s in available if s.models is None or model in s.models]
+            candidates = with_model or available
+
+            rates = [s.tokens_per_s for s in candidates if s.tokens_per_s]
+            default_rate = statistics.median(rates) if rates else DEFAULT_TOKENS_PER_S
+            return min(
+                candidates, key=lambda s: self._expected_time(s, model, default_rate)
+            ).url
+
+    def acquire(self, url):
+        """Count a request that is now streaming from url."""
+        with self._lock:
+            state = self._endpoints.get(url)
+            if state is not None:
+                state.in_flight += 1
+
+    def release(self, url, model=None, metrics=None):
+        """Finish a request on url, folding its metrics into the node's averages."""
+        with self._lock:
+            state = self._endpoints.get(url)
+            if state is None:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+            if metrics:
+                state.tokens_per_s = _ewma(state.tokens_per_s, metrics.get("tokens_per_s"))
+                state.ttft_s = _ewma(state.ttft_s, metrics.get("ttft_s"))
+                if metrics.get("load_s", 0) and metrics["load_s"] >= 0.5:
+                    state.load_s = _ewma(state.load_s, metrics["load_s"])
+                if model:
+                    state.loaded.add(normalize_model_name(model))
+                self._mark_up(state)
+
+    def mark_loaded(self, url, model):
+        """Note that model was just loaded on url, e.g. by a warm-up."""
+        with self._lock:
+            state = self._endpoints.get(url)
+            if state is not None:
+                state.loaded.add(normalize_model_name(model))
+                self._mark_up(state)
+
+    def report_failure(self, url):
+        """Take url out of rotation for a backoff that grows with each failure."""
+        settings = get_health_settings()
+        with self._lock:
+            state = self._endpoints.get(url)
+            if state is None:
+                return
+            was_healthy = state.healthy
+            state.failures += 1
+            state.healthy = False
+            state.down_until = time.monotonic() + min(
+                settings["backoff_max"], settings["backoff_min"] * 2 ** (state.failures - 1)
+            )
+            state.loaded.clear()
+            pooled = len(self._endpoints) > 1
+        if was_healthy and (DEBUG or pooled):
+            print(f"Ollama endpoint {url} is down, routing around it")
+
+    def _mark_up(self, state):
+        if not state.healthy and DEBUG:
+            print(f"Ollama endpoint {state.url} is back")
+        state.healthy = True
+        state.failures = 0
+        state.down_until = 0.0
+
+    def probe(self, timeout=2.0):
+        """Check every node and its loaded models with /api/ps, True if any is up."""
+        any_up = False
+        for url in self.sync():
+            try:
+                response = connection_manager.get(f"{url}/api/ps", timeout=timeout)
+                response.raise_for_status()
+                loaded = {
+                    normalize_model_name(m.get("name") or m.get("model", ""))
+                    for m in response.json().get("models", [])
+                }
+            except Exception as e:
+                if DEBUG:
+                    print(f"Probe of {url} failed: {e}")
+                self.report_failure(url)
+                continue
+            any_up = True
+            with self._lock:
+                state = self._endpoints.get(url)
+                if state is not None:
+                    state.loaded = loaded
+                    self._mark_up(state)
+        return any_up
+
+    def fetch_models(self, timeout=2.0):
+        """List the models of every node, returns their union.
+
+        Raises the last error when no node could be listed. A node that is
+        only slow to answer stays in rotation, only the probes decide that.
+        """
+        models = set()
+        reached = False
+        error = None
+        for url in self.sync():
+            try:
+                response = connection_manager.get(
+                    f"{url}/api/tags",
+                    timeout=timeout,
+                    headers={"Accept": "application/json"},
+                )
+                response.raise_for_status()
+                names = {model["name"] for model in response.json().get("models", [])}
+            except Exception as e:
+                error = e
+                if not isinstance(e, requests.Timeout):
+                    self.report_failure(url)
+                continue
+            reached = True
+            models |= names
+            with self._lock:
+                state = self._endpoints.get(url)
+                if state is not None:
+                    state.models = {normalize_model_name(name) for name in names}
+                    self._mark_up(state)
+        if not reached and error is not None:
+            raise error
+        return sorted(models)
+
+    def get_stats(self):
+        """Return the known state of every node."""
+        with self._lock:
+            return [state.to_dict() for state in self._endpoints.values()]
+
+
+endpoint_pool = EndpointPool()
+
+
+def get_endpoint_stats():
+    """Return the routing state of the shared Ollama endpoint pool."""
+    return endpoint_pool.get_stats()
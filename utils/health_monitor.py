@@ -0,0 +1,87 @@
+import sys
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from utils.provider_engine import get_provider_engine
+from utils.provider_utils import check_provider_status
+from utils.settings_manager import get_health_settings
+
+DEBUG = "-debug" in sys.argv
+
+
+class HealthMonitor(QObject):
+    """Single source of provider liveness.
+
+    While online, successful traffic counts as proof of life and an active
+    probe only runs after interval_s without any. While offline, probes are
+    retried with exponential backoff. status_changed fires only on changes.
+    """
+
+    status_changed = pyqtSignal(bool, str)  # online, provider
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        settings = get_health_settings()
+        self.probe_timeout = settings["probe_timeout"]
+        self.interval_s = settings["interval"]
+        self.backoff_min_s = settings["backoff_min"]
+        self.backoff_max_s = settings["backoff_max"]
+
+        self.online = False
+        self.provider = ""
+        self.backoff_s = self.backoff_min_s
+        self.last_alive = 0.0
+        self._probe_future = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.check_now)
+
+    def start(self):
+        """Probe right away and keep monitoring from there."""
+        self.check_now()
+
+    def check_now(self):
+        """Run an active probe unless one is already in flight."""
+        self._timer.stop()
+        if self._probe_future is not None and not self._probe_future.done():
+            return
+        self._probe_future = get_provider_engine().submit(
+            check_provider_status, self.probe_timeout, callback=self._on_probe_result
+        )
+
+    def report_success(self):
+        """Passive liveness: a response or listing just came back fine."""
+        self.last_alive = time.monotonic()
+        self._set_status(True, self.provider)
+        self._schedule(self.interval_s)
+
+    def report_failure(self):
+        """A request failed to reach the provider, confirm with a probe soon."""
+        self._set_status(False, self.provider)
+        self.backoff_s = self.backoff_min_s
+        self._schedule(self.backoff_s)
+
+    def _on_probe_result(self, result):
+        if result is None:  # The probe itself raised
+            result = (False, self.provider)
+        online, provider = result
+        if online:
+            self.last_alive = time.monotonic()
+            self.backoff_s = self.backoff_min_s
+            self._schedule(self.interval_s)
+        else:
+            self._schedule(self.backoff_s)
+            self.backoff_s = min(self.backoff_max_s, self.backoff_s * 2)
+        self._set_status(online, provider)
+
+    def _schedule(self, delay_s):
+        self._timer.start(int(delay_s * 1000))
+
+    def _set_status(self, online, provider):
+        changed = online != self.online or provider != self.provider
+        self.online = online
+        self.provider = provider
+        if changed:
+            if DEBUG:
+                print(f"Provider {provider or 'unknown'} is {'online' if online else 'offline'}")
+            self.status_changed.emit(online, provider)
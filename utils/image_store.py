@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from utils.settings_manager import get_image_cache_settings
+
+IMAGE_SCHEME = "pixelllama-img"
+
+
+def guess_image_mime(data: bytes) -> str:
+    """Guess the image MIME type from its magic bytes."""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class ImageStore:
+    """Content-addressed image store with an in-memory LRU in front of a disk cache.
+
+    The disk cache only mirrors images of the chat history, which keeps the
+    data URLs. Entries no longer referenced are deleted with forget() and
+    retain(), and the cache is held under a size and an age limit, least
+    recently used first. An evicted image is written again when rendered.
+    """
+
+    def __init__(self, cache_dir: str = "image_cache", max_memory_items: int = 64):
+        self.base_dir = Path(__file__).parent.parent
+        self.cache_path = self.base_dir / cache_dir
+        self.max_memory_items = max_memory_items
+        limits = get_image_cache_settings()
+        self.max_disk_bytes = limits["max_bytes"]
+        self.max_age_s = limits["max_age_s"]
+        self._memory = OrderedDict()  # key -> bytes
+        self._url_keys = OrderedDict()  # data URL -> key, avoids re-hashing
+
+    def put_data_url(self, data_url: str) -> str:
+        """Store the image behind a data URL and return its content key."""
+        key = self._url_keys.get(data_url)
+        if key is not None:
+            self._url_keys.move_to_end(data_url)
+            return key
+
+        data = base64.b64decode(data_url.split(",", 1)[1])
+        key = self.put_bytes(data)
+        self._remember_url(data_url, key)
+        return key
+
+    def key_for(self, data_url: str) -> str:
+        """Return the content key of the image behind a data URL without storing it."""
+        key = self._url_keys.get(data_url)
+        if key is None:
+            key = self._hash(base64.b64decode(data_url.split(",", 1)[1]))
+            self._remember_url(data_url, key)
+        return key
+
+    def _remember_url(self, data_url, key):
+        self._url_keys[data_url] = key
+        self._url_keys.move_to_end(data_url)
+        if len(self._url_keys) > self.max_memory_items:
+            self._url_keys.popitem(last=False)
+
+    @staticmethod
+    def _hash(data):
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    def put_bytes(self, data: bytes) -> str:
+        """Store raw image bytes and return their content key."""
+        key = self._hash(data)
+        self._remember(key, data)
+
+        file_path = self.cache_path / key
+        if not file_path.exists():
+            try:
+                self.cache_path.mkdir(parents=True, exist_ok=True)
+                file_path.write_bytes(data)
+            except Exception as e:
+                print(f"Error writing image cache: {e}")
+            self.enforce_limits(keep=(key,))
+        return key
+
+    def get(self, key: str):
+        """Return the image bytes for key, or None if unknown."""
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return data
+
+        file_path = self.cache_path / key
+        if not file_path.is_file():
+            return None
+        try:
+            data = file_path.read_bytes()
+        except Exception as e:
+            print(f"Error reading image cache: {e}")
+            return None
+
+        self._remember(key, data)
+        try:
+            os.utime(file_path)  # Recently shown images are evicted last
+        except OSError:
+            pass
+        return data
+
+    def forget(self, keys):
+        """Delete the given images from memory and disk."""
+        keys = set(keys)
+        if not keys:
+            return
+        for key in keys:
+            self._memory.pop(key, None)
+            try:
+                (self.cache_path / key).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Error deleting cached image: {e}")
+        # Forgotten images are stored again if a data URL shows up once more
+        for data_url in [u for u, k in self._url_keys.items() if k in keys]:
+            del self._url_keys[data_url]
+
+    def retain(self, keys):
+        """Delete every cached image whose key is not in keys."""
+        keys = set(keys)
+        self.forget([key for key, _, _ in self._list_files() if key not in keys])
+        self.forget([key for key in self._memory if key not in keys])
+
+    def enforce_limits(self, keep=()):
+        """Delete images past the age limit, then the least recently used above the size limit."""
+        files = sorted(self._list_files(), key=lambda entry: entry[2])  # Oldest first
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+        evict = []
+        for key, size, mtime in files:
+            if key in keep:
+                continue
+            if now - mtime > self.max_age_s or total > self.max_disk_bytes:
+                evict.append(key)
+                total -= size
+        self.forget(evict)
+
+    def _list_files(self):
+        """Return (key, size, mtime) of every file in the disk cache."""
+        entries = []
+        if not self.cache_path.is_dir():
+            return entries
+        for path in self.cache_path.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                entries.append((path.name, stat.st_size, stat.st_mtime))
+        return entries
+
+    def url_for(self, data_url: str) -> str:
+        """Return the short scheme URL that serves the image behind data_url."""
+        return f"{IMAGE_SCHEME}://{self.put_data_url(data_url)}"
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
@@ -0,0 +1,80 @@
+import json
+import statistics
+import sys
+from pathlib import Path
+
+DEBUG = "-debug" in sys.argv
+
+METRICS_LOG_PATH = Path(__file__).parent.parent / "metrics_log.jsonl"
+
+
+def record_metrics(metrics, path=METRICS_LOG_PATH):
+    """Append the metrics of one response as a JSON line."""
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(metrics) + "\n")
+    except Exception as e:
+        print(f"Error recording response metrics: {e}")
+
+
+def load_metrics(model=None, path=METRICS_LOG_PATH):
+    """Return the recorded metrics, oldest first, optionally for one model only."""
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by a crash
+                if model is None or record.get("model") == model:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading response metrics: {e}")
+    return records
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(records):
+    """Return count, median/p90 time to first token and median tokens/s of records."""
+    ttft = [r["ttft_s"] for r in records if r.get("ttft_s") is not None]
+    rate = [r["tokens_per_s"] for r in records if r.get("tokens_per_s") is not None]
+    return {
+        "count": len(records),
+        "ttft_median_s": statistics.median(ttft) if ttft else None,
+        "ttft_p90_s": _percentile(ttft, 0.9) if ttft else None,
+        "tokens_per_s_median": statistics.median(rate) if rate else None,
+    }
+
+
+def _format(summary):
+    def value(number, unit):
+        return f"{number:.2f}{unit}" if number is not None else "-"
+
+    return (
+        f"{summary['count']:>5}  "
+        f"ttft {value(summary['ttft_median_s'], 's')} (p90 {value(summary['ttft_p90_s'], 's')})  "
+        f"{value(summary['tokens_per_s_median'], ' tok/s')}"
+    )
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.metrics_log [model]
+    records = load_metrics(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not records:
+        print(f"No metrics recorded in {METRICS_LOG_PATH}")
+        sys.exit(0)
+
+    by_model = {}
+    for record in records:
+        by_model.setdefault(record.get("model") or "unknown", []).append(record)
+    for model, model_records in sorted(by_model.items()):
+        print(f"{model}")
+        print(f"  all     {_format(summarize(model_records))}")
+        print(f"  last 20 {_format(summarize(model_records[-20:]))}")
@@ -0,0 +1,492 @@
+"""Stand-in Ollama / OpenAI-compatible server for benchmarks and regression runs.
+
+Serves /api/tags, /api/ps, /api/version, /api/show, /api/generate, /api/chat,
+/v1/models and /v1/chat/completions with deterministic streamed output at
+a configurable time to first token, token rate and chunk size, plus
+injected HTTP errors, dropped connections and stalls. Needs no GPU and no
+network.
+
+    python -m utils.mock_provider --port 11435 --rate 40 --ttft 0.3
+
+Point the Ollama URL at http://127.0.0.1:11435, or the OpenAI URL at
+http://127.0.0.1:11435/v1 with any API key.
+"""
+
+import argparse
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEBUG = "-debug" in sys.argv
+
+_WORDS = (
+    "the quick brown fox jumps over a lazy dog while pixel llama watches "
+    "from the window and counts every token that streams past"
+).split()
+
+
+class MockConfig:
+    """Behaviour of the mock server, every field can be changed while it runs."""
+
+    def __init__(
+        self,
+        models=("mock-llama:latest", "mock-vision:7b"),
+        tokens=200,
+        rate=50.0,
+        ttft=0.2,
+        chunk_size=1,
+        load_time=0.0,
+        error_rate=0.0,
+        error_status=500,
+        drop_rate=0.0,
+        stall_rate=0.0,
+        stall_time=30.0,
+        seed=0,
+    ):
+        self.models = list(models)
+        self.tokens = tokens  # Tokens per response unless the request limits it
+        self.rate = rate  # Tokens per second, 0 streams as fast as possible
+        self.ttft = ttft  # Seconds before the first chunk, includes the prefill
+        self.chunk_size = chunk_size  # Tokens per streamed chunk
+        self.load_time = load_time  # Extra delay the first time a model is used
+        self.error_rate = error_rate  # Share of requests answered with error_status
+        self.error_status = error_status
+        self.drop_rate = drop_rate  # Share of streams cut off mid-response
+        self.stall_rate = stall_rate  # Share of streams that hang mid-response
+        self.stall_time = stall_time  # Seconds a stalled stream stays silent
+        self.seed = seed
+
+
+class MockState:
+    """Counters and randomness shared by all request handlers."""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.loaded_models = set()
+        self.requests = 0
+        self.errors = 0
+        self.drops = 0
+        self.stalls = 0
+
+    def roll(self, probability):
+        with self.lock:
+            return probability > 0 and self.random.random() < probability
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "drops": self.drops,
+                "stalls": self.stalls,
+                "loaded_models": sorted(self.loaded_models),
+            }
+
+
+def generate_tokens(count, offset=0):
+    """Return count deterministic tokens, each a word followed by a space."""
+    return [f"{_WORDS[(offset + i) % len(_WORDS)]} " for i in range(count)]
+
+
+def _dumps(data):
+    # Compact like Ollama and OpenAI, the client's fast parse path relies on it
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _timestamp():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real servers
+    server_version = "PixelLlamaMock/1.0"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    @property
+    def config(self):
+        return self.server.state.config
+
+    def log_message(self, format, *args):
+        if DEBUG:
+            super().log_message(format, *args)
+
+    # Plumbing
+
+    def _send_json(self, data, status=200):
+        body = _dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _drop_connection(self):
+        """Cut the stream without the terminating chunk, as a crashed server would."""
+        with self.state.lock:
+            self.state.drops += 1
+        self.close_connection = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _begin_generation(self, model):
+        """Count the request and apply injected errors, returns False when answered."""
+        with self.state.lock:
+            self.state.requests += 1
+        if self.state.roll(self.config.error_rate):
+            with self.state.lock:
+                self.state.errors += 1
+            self._send_json(
+                {"error": f"mock error injected for {model}"}, self.config.error_status
+            )
+            return False
+        # Like Ollama, a name without a tag means :latest
+        if model not in self.config.models and f"{model}:latest" not in self.config.models:
+            self._send_json({"error": f"model '{model}' not found"}, 404)
+            return False
+        return True
+
+    def _load_model(self, model):
+        """Simulate the model load, returns the load time in seconds."""
+        with self.state.lock:
+            loaded = model in self.state.loaded_models
+            self.state.loaded_models.add(model)
+        if loaded or not self.config.load_time:
+            return 0.0
+        time.sleep(self.config.load_time)
+        return self.config.load_time
+
+    def _stream_tokens(self, tokens, write):
+        """Pace tokens out through write(text), returns False if the stream was dropped."""
+        config = self.config
+        chunk_size = max(1, config.chunk_size)
+        drop_at = stall_at = None
+        if tokens and self.state.roll(config.drop_rate):
+            drop_at = self.state.random.randrange(len(tokens))
+        if tokens and self.state.roll(config.stall_rate):
+            stall_at = self.state.random.randrange(len(tokens))
+
+        start = time.perf_counter()
+        for index in range(0, len(tokens), chunk_size):
+            if drop_at is not None and index >= drop_at:
+                self._drop_connection()
+                return False
+            if stall_at is not None and index >= stall_at:
+                stall_at = None
+                with self.state.lock:
+                    self.state.stalls += 1
+                time.sleep(config.stall_time)
+                start += config.stall_time
+            # Scheduled against the start, so slow writes don't add drift
+            due = start + config.ttft + (index / config.rate if config.rate > 0 else 0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            write("".join(tokens[index : index + chunk_size]))
+        return True
+
+    def _response_tokens(self, request, limit):
+        """Return the response tokens and a rough prompt token count."""
+        count = self.config.tokens
+        if isinstance(limit, int) and limit > 0:
+            count = min(count, limit)
+        prompt_tokens = len(_dumps(request.get("messages", []))) // 4
+        return generate_tokens(count, offset=prompt_tokens), prompt_tokens
+
+    # Routing
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/api/tags":
+            self._send_json(
+                {
+                    "models": [
+                        {"name": name, "model": name, "modified_at": _timestamp(), "size": 0}
+                        for name in self.config.models
+                    ]
+                }
+            )
+        elif path == "/api/ps":
+            with self.state.lock:
+                loaded = sorted(self.state.loaded_models)
+            self._send_json({"models": [{"name": name, "model": name} for name in loaded]})
+        elif path == "/api/version":
+            self._send_json({"version": "0.0.0-mock"})
+        elif path == "/v1/models":
+            self._send_json(
+                {
+                    "object": "list",
+                    "data": [
+                        {"id": name, "object": "model", "owned_by": "mock"}
+                        for name in self.config.models
+                    ],
+                }
+            )
+        elif path == "/mock/stats":
+            self._send_json(self.state.get_stats())
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        request = self._read_json()
+        if request is None:
+            self._send_json({"error": "invalid JSON body"}, 400)
+            return
+        if path == "/api/chat":
+            self._handle_ollama_chat(request)
+        elif path == "/api/generate":
+            self._handle_ollama_generate(request)
+        elif path == "/api/show":
+            self._send_json({"model_info": {"mock.context_length": 8192}})
+        elif path == "/v1/chat/completions":
+            self._handle_openai_chat(request)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    # Ollama
+
+    def _handle_ollama_generate(self, request):
+        """Only the empty-prompt load request is supported, as sent by the warmer."""
+        model = request.get("model", "")
+        if not self._begin_generation(model):
+            return
+        load_s = self._load_model(model)
+        self._send_json(
+            {
+                "model": model,
+                "created_at": _timestamp(),
+                "response": "",
+                "done": True,
+                "done_reason": "load",
+                "load_duration": int(load_s * 1e9),
+            }
+        )
+
+    def _handle_ollama_chat(self, request):
+        model = request.get("model", "")
+        if not self._begin_generation(model):
+            return
+        start = time.perf_counter()
+        load_s = self._load_model(model)
+        options = request.get("options") or {}
+        tokens, prompt_tokens = self._response_tokens(request, options.get("num_predict"))
+
+        def frame(content, done=False):
+            return {
+                "model": model,
+                "created_at": _timestamp(),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+
+        def done_frame():
+            total_s = time.perf_counter() - start
+            prefill_s = min(self.config.ttft, total_s)
+            data = frame("", done=True)
+            data.update(
+                done_reason="stop",
+                total_duration=int(total_s * 1e9),
+                load_duration=int(load_s * 1e9),
+                prompt_eval_count=prompt_tokens,
+                prompt_eval_duration=int(prefill_s * 1e9),
+                eval_count=len(tokens),
+                eval_duration=int(max(total_s - load_s - prefill_s, 0) * 1e9),
+            )
+            return data
+
+        if request.get("stream") is False:
+            if not self._stream_tokens(tokens, lambda text: None):
+                return
+            data = done_frame()
+            data["message"]["content"] = "".join(tokens)
+            self._send_json(data)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        write = lambda text: self._write_chunk(
+            (_dumps(frame(text)) + "\n").encode("utf-8")
+        )
+        try:
+            if self._stream_tokens(tokens, write):
+                self._write_chunk((_dumps(done_frame()) + "\n").encode("utf-8"))
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The client cancelled
+
+    # OpenAI
+
+    def _handle_openai_chat(self, request):
+        model = request.get("model", "")
+        if not self._begin_generation(model):
+            return
+        self._load_model(model)
+        tokens, prompt_tokens = self._response_tokens(request, request.get("max_tokens"))
+        completion_id = f"chatcmpl-mock{self.state.requests}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+
+        if not request.get("stream"):
+            if not self._stream_tokens(tokens, lambda text: None):
+                return
+            self._send_json(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                }
+            )
+            return
+
+        def event(delta, finish_reason=None):
+            send_event([{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+        def send_event(choices, **extra):
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+                **extra,
+            }
+            self._write_chunk(f"data: {_dumps(data)}\n\n".encode("utf-8"))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            event({"role": "assistant", "content": ""})
+            if not self._stream_tokens(tokens, lambda text: event({"content": text})):
+                return
+            event({}, "stop")
+            if (request.get("stream_options") or {}).get("include_usage"):
+                send_event([], usage=usage)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config=None):
+        super().__init__(address, MockProviderHandler)
+        self.state = MockState(config or MockConfig())
+
+    def handle_error(self, request, client_address):
+        # Clients aborting streams is expected, only report real failures
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_mock_server(host="127.0.0.1", port=0, config=None):
+    """Start a mock server on a background thread and return it.
+
+    Port 0 picks a free port, see server.url. Stop it with server.shutdown().
+    """
+    server = MockProviderServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="mock-provider", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", default="mock-llama:latest,mock-vision:7b",
+                        help="comma separated model names")
+    parser.add_argument("--tokens", type=int, default=200, help="tokens per response")
+    parser.add_argument("--rate", type=float, default=50.0,
+                        help="tokens per second, 0 for unthrottled")
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds to the first token")
+    parser.add_argument("--chunk-size", type=int, default=1, help="tokens per chunk")
+    parser.add_argument("--load-time", type=float, default=0.0,
+                        help="seconds added to the first request of each model")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of requests that fail with --error-status")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="share of streams whose connection drops mid-response")
+    parser.add_argument("--stall-rate", type=float, default=0.0,
+                        help="share of streams that go silent mid-response")
+    parser.add_argument("--stall-time", type=float, default=30.0,
+                        help="seconds a stalled stream stays silent")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-debug", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        models=[name.strip() for name in args.models.split(",") if name.strip()],
+        tokens=args.tokens,
+        rate=args.rate,
+        ttft=args.ttft,
+        chunk_size=args.chunk_size,
+        load_time=args.load_time,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        drop_rate=args.drop_rate,
+        stall_rate=args.stall_rate,
+        stall_time=args.stall_time,
+        seed=args.seed,
+    )
+    server = MockProviderServer((args.host, args.port), config)
+    print(f"Mock provider listening on {server.url} (OpenAI: {server.url}/v1)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Mock provider stopped: {server.state.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
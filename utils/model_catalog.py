@@ -0,0 +1,105 @@
+import sys
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
+from utils.provider_engine import get_provider_engine
+from utils.provider_utils import ModelListError, fetch_models
+from utils.settings_manager import get_model_catalog_ttl, get_provider
+
+DEBUG = "-debug" in sys.argv
+
+
+class ModelCatalog(QObject):
+    """In-memory model list per provider, refreshed in the background.
+
+    Readers only ever see the cached snapshot, fetching happens on the
+    provider engine. A failed fetch keeps the previous list, marked stale,
+    and its reason is available from get_error(). models_changed fires only
+    when a provider's list is actually different, refreshed fires after
+    every completed fetch.
+    """
+
+    models_changed = pyqtSignal(str, list)  # provider, sorted model names
+    refreshed = pyqtSignal(str, bool)  # provider, reachable
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ttl = get_model_catalog_ttl()
+        self._entries = {}  # provider -> (models, fetched_at, reachable)
+        self._errors = {}  # provider -> why the last fetch failed
+        self._pending = {}  # provider -> future of the in-flight fetch
+
+    def snapshot(self, provider=None):
+        """Return the cached model names for provider, possibly stale or empty."""
+        entry = self._entries.get(provider or get_provider())
+        return list(entry[0]) if entry else []
+
+    def is_reachable(self, provider=None):
+        entry = self._entries.get(provider or get_provider())
+        return bool(entry and entry[2])
+
+    def get_error(self, provider=None):
+        """Return why the last fetch of provider failed, None if it succeeded."""
+        return self._errors.get(provider or get_provider())
+
+    def is_stale(self, provider=None):
+        """A list is stale after the TTL, or right away if the last fetch failed."""
+        entry = self._entries.get(provider or get_provider())
+        if entry is None or not entry[2]:
+            return True
+        return time.monotonic() - entry[1] > self.ttl
+
+    def refresh(self, provider=None, force=False):
+        """Fetch the list in the background if it is stale, or always when forced."""
+        provider = provider or get_provider()
+        pending = self._pending.get(provider)
+        if pending is not None and not pending.done():
+            return pending  # Never stack fetches for the same provider
+        if not force and not self.is_stale(provider):
+            return None
+
+        future = get_provider_engine().submit(
+            self._fetch,
+            provider,
+            callback=lambda result: self._apply(provider, *result),
+        )
+        self._pending[provider] = future
+        return future
+
+    def invalidate(self, provider=None):
+        """Drop the cached lists, e.g. after the endpoint settings changed."""
+        if provider is None:
+            self._entries.clear()
+            self._errors.clear()
+        else:
+            self._entries.pop(provider, None)
+            self._errors.pop(provider, None)
+
+    @staticmethod
+    def _fetch(provider):
+        """Return (models, error), runs on the provider engine."""
+        try:
+            return fetch_models(provider), None
+        except ModelListError as e:
+            return None, str(e)
+
+    def _apply(self, provider, models, error):
+        previous = self._entries.get(provider)
+        if error is not None:
+            # Keep serving the last good list, unreachable makes it stale
+            if DEBUG:
+                print(f"Model catalog for {provider} not refreshed: {error}")
+            self._errors[provider] = error
+            if previous is not None:
+                self._entries[provider] = (previous[0], previous[1], False)
+            self.refreshed.emit(provider, False)
+            return
+
+        self._errors.pop(provider, None)
+        models = sorted(models)
+        self._entries[provider] = (models, time.monotonic(), True)
+
+        if previous is None or previous[0] != models:
+            if DEBUG:
+                print(f"Model catalog for {provider} changed: {len(models)} models")
+            self.models_changed.emit(provider, list(models))
+        self.refreshed.emit(provider, True)
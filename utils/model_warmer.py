@@ -0,0 +1,111 @@
+import re
+import sys
+import time
+from PyQt6.QtCore import QObject, QTimer
+from utils.provider_engine import get_provider_engine
+from utils.provider_utils import warm_model
+from utils.settings_manager import get_ollama_keep_alive, get_provider, load_settings_from_file
+
+DEBUG = "-debug" in sys.argv
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_keep_alive_seconds(keep_alive):
+    """Convert an Ollama keep_alive value (300, "5m", "1h30m", -1) to seconds.
+
+    Returns None for negative values, which keep the model loaded forever.
+    """
+    if isinstance(keep_alive, (int, float)):
+        return None if keep_alive < 0 else float(keep_alive)
+    text = str(keep_alive).strip()
+    if text.startswith("-"):
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", text)
+    if not parts:
+        return 300.0  # Ollama's own default
+    return sum(float(value) * _DURATION_UNITS[unit] for value, unit in parts)
+
+
+class ModelWarmer(QObject):
+    """Load the active Ollama model ahead of the first message and keep it resident.
+
+    Warm requests are empty generate calls with keep_alive, run on the
+    provider engine. While the app is open the target model is re-warmed
+    before its keep-alive runs out.
+    """
+
+    # Skip re-warming a model that was loaded this recently
+    MIN_WARM_INTERVAL_S = 30
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.keep_alive = get_ollama_keep_alive()
+        keep_alive_s = parse_keep_alive_seconds(self.keep_alive)
+
+        self.model = None
+        self.last_warmed = {}  # model -> monotonic time of the last warm
+        self._pending = {}  # model -> future
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.timeout.connect(self.refresh)
+        if keep_alive_s:
+            # Renew halfway through the keep-alive window
+            self._refresh_timer.setInterval(int(max(keep_alive_s / 2, 5) * 1000))
+
+    def keep_resident(self, model):
+        """Make model the one kept loaded, without warming it right now."""
+        if not model:
+            return
+        self.model = model
+        if self._refresh_timer.interval() > 0 and not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def warm(self, model):
+        """Load model in the background and keep it resident from now on."""
+        self.keep_resident(model)
+        if not model or get_provider() != "ollama":
+            return None
+
+        pending = self._pending.get(model)
+        if pending is not None and not pending.done():
+            return pending
+        last = self.last_warmed.get(model)
+        if last is not None and time.monotonic() - last < self.MIN_WARM_INTERVAL_S:
+            return None
+
+        if DEBUG:
+            print(f"Warming model {model}")
+        future = get_provider_engine().submit(
+            self._warm, model, callback=lambda result: self._on_warmed(model, result)
+        )
+        self._pending[model] = future
+        return future
+
+    def refresh(self):
+        """Renew the keep-alive of the resident model."""
+        if self.model:
+            self.last_warmed.pop(self.model, None)
+            self.warm(self.model)
+
+    def _warm(self, model):
+        start = time.perf_counter()
+        try:
+            load_s = warm_model(model, load_settings_from_file().get("context_size"))
+        except Exception as e:
+            if DEBUG:
+                print(f"Warming {model} failed: {e}")
+            return None
+        return load_s, time.perf_counter() - start
+
+    def _on_warmed(self, model, result):
+        if result is None:
+            return
+        self.last_warmed[model] = time.monotonic()
+        if DEBUG:
+            load_s, total_s = result
+            print(f"Model {model} warm: load {load_s:.2f}s, request {total_s:.2f}s")
@@ -0,0 +1,159 @@
+import asyncio
+import queue
+import sys
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+from utils.connection_manager import connection_manager
+from utils.settings_manager import get_engine_settings
+
+DEBUG = "-debug" in sys.argv
+
+
+class ProviderEngine(QObject):
+    """Run all provider traffic on one long-lived asyncio loop.
+
+    The loop lives on a dedicated thread and every provider call is a
+    cancellable task on it. Blocking HTTP reads run on two small bounded
+    executors owned by the loop, so the thread count stays fixed no matter how
+    many requests or status checks are issued. Chat streams have their own
+    executor, so warm-ups, probes and model listings can never hold up a
+    response. Results come back to the Qt thread through a single thread-safe
+    queue that is drained once per wake-up.
+    """
+
+    _results_pending = pyqtSignal()
+
+    def __init__(self, stream_workers=None, background_workers=None, parent=None):
+        super().__init__(parent)
+        settings = get_engine_settings()
+        if stream_workers is None:
+            stream_workers = settings["stream_workers"]
+        if background_workers is None:
+            background_workers = settings["background_workers"]
+
+        self._results = queue.SimpleQueue()  # (callback, args) for the Qt thread
+        self._lock = threading.Lock()
+        self._pending = False
+        self._results_pending.connect(self._drain_results)
+        self._requests = weakref.WeakSet()  # In-flight requests, cancelled on shutdown
+
+        self._stream_executor = ThreadPoolExecutor(
+            max_workers=max(1, stream_workers), thread_name_prefix="provider-stream"
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, background_workers), thread_name_prefix="provider-io"
+        )
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        self._thread = threading.Thread(
+            target=self._run_loop, name="provider-engine", daemon=True
+        )
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, func, *args, callback=None, stream=False):
+        """Run a blocking provider call as a task on the engine.
+
+        callback(result) is invoked on the Qt thread when the call returns.
+        stream runs it on the chat stream executor instead of the background one.
+        Returns a concurrent.futures.Future that can be cancelled.
+        """
+        executor = self._stream_executor if stream else self._executor
+        return asyncio.run_coroutine_threadsafe(
+            self._run_task(func, args, callback, executor), self._loop
+        )
+
+    async def _run_task(self, func, args, callback, executor=None):
+        try:
+            result = await self._loop.run_in_executor(executor, func, *args)
+        except asyncio.CancelledError:
+            if DEBUG:
+                print(f"Provider task cancelled: {getattr(func, '__name__', func)}")
+            raise
+        except Exception as e:
+            print(f"Error in provider task: {e}")
+            return None
+
+        if callback is not None:
+            self.post(callback, result)
+        return result
+
+    def track(self, request):
+        """Have shutdown() call request.cancel() if it is still running by then."""
+        self._requests.add(request)
+
+    def call_later(self, delay_s, func, *args):
+        """Run func(*args) on the engine loop after delay_s. Safe to call from any thread.
+
+        func runs on the loop thread itself, so it must not block.
+        """
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay_s, func, *args)
+
+    def post(self, callback, *args):
+        """Queue callback(*args) to run on the Qt thread. Safe to call from any thread."""
+        self._results.put((callback, args))
+        with self._lock:
+            notify = not self._pending
+            self._pending = True
+        if notify:
+            self._results_pending.emit()
+
+    def _drain_results(self):
+        """Run every queued result callback on the Qt thread."""
+        with self._lock:
+            self._pending = False
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error handling provider result: {e}")
+
+    def shutdown(self):
+        """Cancel in-flight work, stop the loop and release the worker threads.
+
+        The worker threads are joined when the interpreter exits, so nothing
+        may be left blocked on a read: requests are cancelled, and every other
+        socket, e.g. of a warm-up or a probe, is shut down.
+        """
+        for request in list(self._requests):
+            request.cancel()
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._cancel_tasks_and_stop)
+        self._thread.join(timeout=1)
+        connection_manager.abort_all()
+        self._stream_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cancel_tasks_and_stop(self):
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+        # Queued after the cancellations, so the tasks finish before the loop stops
+        self._loop.call_soon(self._loop.stop)
+
+
+_provider_engine = None
+
+
+def get_provider_engine():
+    """Return the shared provider engine, starting it on first use."""
+    global _provider_engine
+    if _provider_engine is None:
+        _provider_engine = ProviderEngine()
+    return _provider_engine
+
+
+def shutdown_provider_engine():
+    """Shut the shared engine down if it was started."""
+    global _provider_engine
+    if _provider_engine is not None:
+        _provider_engine.shutdown()
+        _provider_engine = None
@@ -1,22 +1,59 @@
 from typing import Tuple
 import requests
 import json
+import socket
 import sys
+import threading
+import time
 from datetime import datetime
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
 from PyQt6.QtGui import QImage
 from utils.settings_manager import get_ollama_url, get_system_prompt, get_openai_key, get_openai_url, get_provider
+from utils.settings_manager import get_health_settings, get_http_settings, get_stream_resilience_settings
+from utils.runtime_options import build_ollama_options, build_openai_params
+from utils.connection_manager import connection_manager
+from utils.endpoint_pool import endpoint_pool
+from utils.provider_engine import get_provider_engine
+from utils.stream_parser import iter_ollama_content, iter_openai_content, iter_response_chunks
+from utils.stream_recording import RECORD, StreamRecorder
 
 DEBUG = "-debug" in sys.argv
 
-class ProviderRequest(QThread):
+class ProviderRequest(QObject):
+    """A chat request that runs as a task on the shared provider engine.
+
+    response_chunk_ready is emitted from the engine's I/O thread and is meant
+    for thread-safe receivers such as ChunkCoalescer.push; response_complete
+    is delivered on the Qt thread through the engine's result queue.
+    """
+
     response_chunk_ready = pyqtSignal(str, str)
     response_complete = pyqtSignal(str)
+    metrics_ready = pyqtSignal(str, dict)  # message_id, response metrics
+    response_truncated = pyqtSignal(str, str)  # message_id, reason the answer is partial
     request_screenshot = pyqtSignal()
     debug_screenshot_ready = pyqtSignal(QImage)
 
     def __init__(self, messages, screenshots, model, temperature=None, context_size=None, message_id=None):
         super().__init__()
+        self.future = None
+        self.cancelled = False
+        self._response = None  # Open streaming response, closed on cancel
+        self._response_lock = threading.Lock()
+        self._finished = threading.Event()
+        self._cancel_event = threading.Event()  # Interrupts retry backoff waits
+        self.resilience = get_stream_resilience_settings()
+        self.stalled = False  # Set when the watchdog aborted the stream
+        self._stall_limit = None
+        self._last_activity = None  # perf_counter of the last received bytes
+        self.endpoint = None  # Ollama node of the endpoint pool serving the request
+        self._endpoint_acquired = False
+        self._failure_reported = False  # The setup already reported the node's failure
+        self.metrics = None
+        self.stats = {}  # Raw counters filled while streaming
+        self._started = None
+        self._first_token = None
+        self.recorder = None  # StreamRecorder when started with -record
         self.messages = messages
         self.screenshots = screenshots if screenshots else []
         self.model = model
@@ -24,6 +61,8 @@ class ProviderRequest(QThread):
         self.context_size = context_size
         self.provider = get_provider()
         self.message_id = message_id
+        # Ending on a partial assistant message asks the model to continue it
+        self.continuation = bool(messages) and messages[-1]["role"] == "assistant"
         
         # Add system prompt to messages
         system_prompt = get_system_prompt()
@@ -36,8 +75,258 @@ class ProviderRequest(QThread):
         self.api_key = get_openai_key() if self.provider == "openai" else None
         self.api_url = get_openai_url() if self.provider == "openai" else get_ollama_url()
 
+    # How often the stall watchdog checks an open stream
+    WATCHDOG_INTERVAL_S = 1.0
+
+    def start(self):
+        """Schedule the request on the provider engine."""
+        engine = get_provider_engine()
+        engine.track(self)
+        self.future = engine.submit(self.run, stream=True)
+
+    def isRunning(self):
+        return self.future is not None and not self._finished.is_set()
+
+    def cancel(self):
+        """Abort the stream and close its connection so the server stops generating.
+
+        Safe to call from the Qt thread while the engine is blocked reading,
+        shutting the socket down makes that read return immediately.
+        """
+        self.cancelled = True
+        self._cancel_event.set()
+        with self._response_lock:
+            response = self._response
+        if response is not None:
+            abort_stream(response)
+
+    def wait(self, timeout=None):
+        """Wait until the request has left the engine, True if it did within timeout."""
+        if self.future is None:
+            return True
+        return self._finished.wait(timeout)
+
+    def _base_url(self, exclude=()):
+        """Return the server to send to, for Ollama the best node of the endpoint pool."""
+        if self.provider == "ollama":
+            return endpoint_pool.choose(self.model, exclude)
+        return self.api_url
+
+    def _open_stream(self, path, payload, headers=None):
+        """Start a streaming POST to path and keep the response around for cancel().
+
+        Failures before anything was generated, a refused connection or a
+        busy server, go right away to another Ollama node when the pool has
+        one left, otherwise they are retried with exponential backoff. Only
+        the backoff retries count against retry_attempts. Once the response
+        is open the stall watchdog guards it.
+        """
+        body = json.dumps(payload).encode("utf-8")
+        self.stats["bytes_sent"] = len(body)
+        headers = {**(headers or {}), "Content-Type": "application/json"}
+        # The read timeout covers the wait for the headers, which may include the model load
+        timeout = (get_http_settings()["connect_timeout"], self.resilience["first_byte_timeout"])
+
+        attempts = max(0, self.resilience["retry_attempts"])
+        delay = self.resilience["retry_backoff"]
+        attempt = 0
+        failed = set()  # Nodes that could not take this request since the last backoff
+        while True:
+            base_url = self._base_url(failed)
+            if not base_url:
+                raise ValueError(f"No {self.provider} URL configured")
+            if self.provider == "ollama":
+                self.endpoint = base_url
+            if DEBUG:
+                print(f"Sending request to {base_url}{path}")
+            try:
+                response = connection_manager.post(
+                    f"{base_url}{path}", data=body, headers=headers, stream=True, timeout=timeout
+                )
+            except requests.ConnectionError as e:
+                if not is_connect_failure(e):
+                    raise
+                if self.endpoint:
+                    endpoint_pool.report_failure(base_url)
+                self._failure_reported = True
+                error = e
+                response = None
+                reason = "connection failed"
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                reason = f"HTTP {response.status_code}"
+                delay = max(delay, get_retry_after(response))
+
+            failed.add(base_url)
+            next_url = self._base_url(failed)
+            if next_url and next_url not in failed:
+                # Another node takes it right away, that costs no retry
+                if response is not None:
+                    response.close()
+                print(f"{base_url} failed ({reason}), sending to {next_url} instead")
+                continue
+            if attempt == attempts:
+                if response is None:
+                    raise error
+                break  # The last busy response is reported as is
+            if response is not None:
+                response.close()
+            attempt += 1
+            print(
+                f"{self.provider} request failed ({reason}), "
+                f"retrying in {delay:g}s ({attempt}/{attempts})"
+            )
+            if self._cancel_event.wait(delay):
+                raise StreamInterrupted("Request cancelled")
+            delay *= 2
+            failed.clear()  # Every node gets another chance after the backoff
+
+        self._failure_reported = False
+        with self._response_lock:
+            self._response = response
+        if self.endpoint:
+            endpoint_pool.acquire(self.endpoint)
+            self._endpoint_acquired = True
+        if self.cancelled:  # Cancelled while waiting for the response headers
+            abort_stream(response)
+        get_provider_engine().call_later(self.WATCHDOG_INTERVAL_S, self._watch_stream)
+        return response
+
+    def _watch_stream(self):
+        """Abort the stream once no bytes arrived for too long, runs on the engine loop."""
+        if self._finished.is_set() or self.cancelled:
+            return
+        if self._last_activity is None:
+            # Nothing yet, the model may still be loading or processing the prompt
+            idle = time.perf_counter() - self._started
+            limit = self.resilience["first_byte_timeout"]
+        else:
+            idle = time.perf_counter() - self._last_activity
+            limit = self.resilience["stall_timeout"]
+        if limit and idle > limit:
+            self.stalled = True
+            self._stall_limit = limit
+            with self._response_lock:
+                response = self._response
+            if response is not None:
+                abort_stream(response)
+            return
+        get_provider_engine().call_later(self.WATCHDOG_INTERVAL_S, self._watch_stream)
+
+    def _track_activity(self, chunks):
+        """Pass raw chunks through, noting when bytes last arrived for the watchdog."""
+        for chunk in chunks:
+            self._last_activity = time.perf_counter()
+            yield chunk
+        if self.stalled:
+            # The aborted socket can look like a clean end of the stream
+            raise StreamInterrupted("Stream stalled")
+
+    def _fail(self, error, connect_message):
+        """Report a failed request.
+
+        A partial answer is kept and marked truncated so it can be continued,
+        instead of being replaced by the error.
+        """
+        partial = self._first_token is not None or self.continuation
+        node_failed = True
+        if self.stalled or isinstance(error, requests.ReadTimeout):
+            limit = self._stall_limit or self.resilience["first_byte_timeout"]
+            message = f"No data from the server for {limit:g}s, request aborted"
+        elif isinstance(error, (requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+            message = "Connection lost" if partial else connect_message
+        elif "ConnectionPool" in str(error) or "NewConnectionError" in str(error):
+            message = connect_message
+        else:
+            message = str(error)
+            node_failed = False
+        if node_failed and self.endpoint and not self.cancelled and not self._failure_reported:
+            # Later requests go to the other nodes until this one answers again
+            endpoint_pool.report_failure(self.endpoint)
+
+        if partial:
+            if not self.cancelled:
+                print(f"Response truncated: {message}")
+                get_provider_engine().post(
+                    self.response_truncated.emit, self.message_id, message
+                )
+        else:
+            self._emit_chunk(f"Error: {message}")
+        self._complete()
+
+    def _emit_chunk(self, chunk):
+        # Nothing is delivered once cancelled, the partial answer is already final
+        if not self.cancelled:
+            self.response_chunk_ready.emit(chunk, self.message_id)
+
+    def _emit_content(self, content):
+        """Emit streamed model output, counting it for the metrics."""
+        if self._first_token is None:
+            self._first_token = time.perf_counter()
+        self.stats["chunks"] = self.stats.get("chunks", 0) + 1
+        if self.recorder is not None:
+            self.recorder.add(content)
+        self._emit_chunk(content)
+
+    def _save_recording(self):
+        if self.recorder is not None and not self.cancelled:
+            self.recorder.save()
+
+    def _emit_metrics(self):
+        """Turn the stream counters into response metrics and hand them to the Qt thread."""
+        if self.cancelled or self._first_token is None:
+            return
+        finished = time.perf_counter()
+        stats = self.stats
+
+        # Ollama reports exact counts and durations (ns), OpenAI at most token usage
+        tokens = stats.get("eval_count") or stats.get("completion_tokens") or stats.get("chunks")
+        decode_s = (
+            stats["eval_duration"] / 1e9
+            if stats.get("eval_duration")
+            else finished - self._first_token
+        )
+        metrics = {
+            "provider": self.provider,
+            "model": self.model,
+            "ttft_s": round(self._first_token - self._started, 3),
+            "total_s": round(finished - self._started, 3),
+            "tokens": tokens,
+            "tokens_per_s": round(tokens / decode_s, 1) if decode_s > 0 else None,
+            "prompt_tokens": stats.get("prompt_eval_count") or stats.get("prompt_tokens"),
+            "prefill_s": (
+                round(stats["prompt_eval_duration"] / 1e9, 3)
+                if stats.get("prompt_eval_duration")
+                else None
+            ),
+            "load_s": (
+                round(stats["load_duration"] / 1e9, 3)
+                if stats.get("load_duration")
+                else None
+            ),
+            "bytes_sent": stats.get("bytes_sent"),
+            "bytes_received": stats.get("bytes_received"),
+            "endpoint": self.endpoint or self.api_url,
+        }
+        self.metrics = metrics
+        if DEBUG:
+            print(f"Response metrics: {metrics}")
+        get_provider_engine().post(self.metrics_ready.emit, self.message_id, metrics)
+
+    def _complete(self):
+        """Hand completion back to the Qt thread through the engine queue."""
+        if self.cancelled:
+            return  # The canceller finalizes the message itself
+        get_provider_engine().post(self.response_complete.emit, self.message_id)
+
     def run(self):
         try:
+            if self.cancelled:
+                return  # Cancelled before the engine picked it up
+            self._started = time.perf_counter()
+            if RECORD:
+                self.recorder = StreamRecorder(self.provider, self.model)
             if self.provider == "ollama":
                 self._run_ollama_request()
             elif self.provider == "openai":
@@ -45,8 +334,16 @@ class ProviderRequest(QThread):
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
         except Exception as e:
-            self.response_chunk_ready.emit(f"Error: {str(e)}", self.message_id)
-            self.response_complete.emit(self.message_id)
+            self._emit_chunk(f"Error: {str(e)}")
+            self._complete()
+        finally:
+            with self._response_lock:
+                response, self._response = self._response, None
+            if response is not None:
+                response.close()
+            if self._endpoint_acquired:
+                endpoint_pool.release(self.endpoint, self.model, self.metrics)
+            self._finished.set()
 
     def _run_ollama_request(self):
         try:
@@ -90,65 +387,51 @@ class ProviderRequest(QThread):
                         "content": content
                     })
 
-            # Build request parameters
+            # Build request parameters, Ollama only honours its own option names
+            options, keep_alive = build_ollama_options(
+                self.model, self.temperature, self.context_size
+            )
             request_params = {
                 "model": self.model,
                 "messages": formatted_messages,
                 "stream": True,
-                "options": {},
+                "options": options,
+                "keep_alive": keep_alive,
             }
 
-            if self.temperature is not None:
-                request_params["options"]["temperature"] = self.temperature
-            if self.context_size is not None:
-                request_params["options"]["context_size"] = self.context_size
-
-            ollama_url = get_ollama_url()
-
             # Debug print the request
             if DEBUG:
                 print("Request to Ollama:")
-                print(f"URL: {ollama_url}/api/chat")
                 print("Messages structure:", json.dumps(request_params["messages"], indent=2))
 
-            # Make streaming request to Ollama API
-            response = requests.post(
-                f"{ollama_url}/api/chat", 
-                json=request_params, 
-                stream=True
-            )
+            # Make streaming request to the best Ollama node
+            response = self._open_stream("/api/chat", request_params)
             response.raise_for_status()
 
-            full_response = ""
-            for line in response.iter_lines():
-                if line:
-                    chunk = json.loads(line)
-                    if "message" in chunk and "content" in chunk["message"]:
-                        content = chunk["message"]["content"]
-                        full_response += content
-                        self.response_chunk_ready.emit(content, self.message_id)
+            # The message owns the text, we only need to know whether any arrived
+            received_content = False
+            chunks = self._track_activity(iter_response_chunks(response, self.stats))
+            for content in iter_ollama_content(chunks, self.stats):
+                if self.cancelled:
+                    break
+                received_content = True
+                self._emit_content(content)
 
-            if not full_response:
-                self.response_chunk_ready.emit("No response received from Ollama.", self.message_id)
+            if not received_content and not self.cancelled and not self.continuation:
+                self._emit_chunk("No response received from Ollama.")
 
-            self.response_complete.emit(self.message_id)
+            self._emit_metrics()
+            self._save_recording()
+            self._complete()
 
-        except requests.ConnectionError:
-            self.response_chunk_ready.emit("Error: Cannot connect to Ollama. Please check if Ollama is running.", self.message_id)
-            self.response_complete.emit(self.message_id)
         except Exception as e:
-            # Simplify generic error messages
-            error_msg = str(e)
-            if "ConnectionPool" in error_msg or "NewConnectionError" in error_msg:
-                error_msg = "Cannot connect to Ollama. Please check if it's running."
-            self.response_chunk_ready.emit(f"Error: {error_msg}", self.message_id)
-            self.response_complete.emit(self.message_id)
+            self._fail(e, "Cannot connect to Ollama. Please check if Ollama is running.")
 
     def _run_openai_request(self):
         try:
             if not self.api_key:
-                self.response_chunk_ready.emit("Error: OpenAI API key not configured", self.message_id)
-                self.response_complete.emit(self.message_id)
+                self._emit_chunk("Error: OpenAI API key not configured")
+                self._complete()
                 return
 
             headers = {
@@ -191,60 +474,40 @@ class ProviderRequest(QThread):
             data = {
                 "model": self.model,
                 "messages": formatted_messages,
-                "stream": True
+                "stream": True,
+                **build_openai_params(self.model, self.temperature),
             }
 
-            if self.temperature is not None:
-                data["temperature"] = self.temperature
-
             # Debug print the request
             if DEBUG:
                 print("OpenAI Request:")
                 print(f"URL: {self.api_url}/chat/completions")
                 print("Messages structure:", json.dumps(data["messages"], indent=2))
 
-            response = requests.post(
-                f"{self.api_url}/chat/completions",
-                headers=headers,
-                json=data,
-                stream=True
-            )
+            response = self._open_stream("/chat/completions", data, headers=headers)
 
             response.raise_for_status()
 
             if response.status_code != 200:
                 error_msg = response.json().get("error", {}).get("message", "Unknown error")
-                self.response_chunk_ready.emit(f"Error: {error_msg}", self.message_id)
-                self.response_complete.emit(self.message_id)
+                self._emit_chunk(f"Error: {error_msg}")
+                self._complete()
                 return
 
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode('utf-8')
-                    if line.startswith("data: "):
-                        if line == "data: [DONE]":
-                            break
-                        
-                        try:
-                            json_data = json.loads(line[6:])  # Skip "data: " prefix
-                            content = json_data["choices"][0]["delta"].get("content", "")
-                            if content:
-                                self.response_chunk_ready.emit(content, self.message_id)
-                        except json.JSONDecodeError:
-                            continue
-
-            self.response_complete.emit(self.message_id)
-
-        except requests.ConnectionError:
-            self.response_chunk_ready.emit("Error: Cannot connect to OpenAI API. Please check your connection and API endpoint.", self.message_id)
-            self.response_complete.emit(self.message_id)
+            chunks = self._track_activity(iter_response_chunks(response, self.stats))
+            for content in iter_openai_content(chunks, self.stats):
+                if self.cancelled:
+                    break
+                self._emit_content(content)
+
+            self._emit_metrics()
+            self._save_recording()
+            self._complete()
+
         except Exception as e:
-            # Simplify generic error messages
-            error_msg = str(e)
-            if "ConnectionPool" in error_msg or "NewConnectionError" in error_msg:
-                error_msg = "Cannot connect to API endpoint. Please check your connection and settings."
-            self.response_chunk_ready.emit(f"Error: {error_msg}", self.message_id)
-            self.response_complete.emit(self.message_id)
+            self._fail(
+                e, "Cannot connect to OpenAI API. Please check your connection and API endpoint."
+            )
 
     def process_image(self, image):
         """Process image to ensure it meets Ollama's requirements."""
@@ -275,34 +538,84 @@ class ProviderRequest(QThread):
         else:
             raise ValueError("Input must be a QImage")
 
-def check_provider_status() -> Tuple[bool, str]:
+# Statuses that mean the server did not start generating, safe to retry
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class StreamInterrupted(Exception):
+    """Raised when a stream was stopped by cancel() or the stall watchdog."""
+
+
+def is_connect_failure(error):
+    """True if the request never reached the server, so retrying cannot duplicate work."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    text = str(error)
+    return "NewConnectionError" in text or "Connection refused" in text
+
+
+def get_retry_after(response, limit=60):
+    """Return the Retry-After delay of a response in seconds, 0 if absent or a date."""
+    try:
+        return min(float(response.headers.get("Retry-After", 0)), limit)
+    except ValueError:
+        return 0
+
+def abort_stream(response):
+    """Shut down the socket under a streaming response.
+
+    This unblocks a pending read on another thread and tells the server the
+    client is gone, so Ollama stops generating. The connection is dropped
+    instead of being returned to the pool.
+    """
+    connection = getattr(response.raw, "connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        response.close()
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+def warm_model(model, context_size=None):
+    """Load an Ollama model without generating, returns its load time in seconds.
+
+    Uses the same load-affecting options as chat requests, otherwise the
+    first message would make Ollama reload the model.
+    """
+    ollama_url = endpoint_pool.choose(model)
+    options, keep_alive = build_ollama_options(model, context_size=context_size)
+    response = connection_manager.post(
+        f"{ollama_url}/api/generate",
+        json={"model": model, "keep_alive": keep_alive, "options": options},
+    )
+    response.raise_for_status()
+    endpoint_pool.mark_loaded(ollama_url, model)
+    return response.json().get("load_duration", 0) / 1e9
+
+def check_provider_status(timeout=2.0) -> Tuple[bool, str]:
     """Check if the selected provider (Ollama or OpenAI) is online."""
     provider = get_provider()
     is_online = False
 
     try:
         if provider == "ollama":
-            # Check Ollama status
-            ollama_url = get_ollama_url()
-            if ollama_url:
-                try:
-                    response = requests.get(f"{ollama_url}/api/tags", timeout=0.1)
-                    is_online = (response.status_code == 200)
-                except (requests.ConnectionError, requests.Timeout):
-                    is_online = False
+            # /api/ps on every node is tiny and tells which models are loaded
+            is_online = endpoint_pool.probe(timeout)
         elif provider == "openai":
             # Check OpenAI status by making a test API call
             openai_api_key = get_openai_key()
             openai_url = get_openai_url()
             if openai_api_key and openai_url:
                 try:
-                    response = requests.get(
+                    response = connection_manager.get(
                         f"{openai_url}/models",
                         headers={
                             "Authorization": f"Bearer {openai_api_key}",
                             "Content-Type": "application/json"
                         },
-                        timeout=0.5
+                        timeout=timeout
                     )
                     is_online = (response.status_code == 200)
                 except (requests.ConnectionError, requests.Timeout):
@@ -314,8 +627,15 @@ def check_provider_status() -> Tuple[bool, str]:
         print(f"Error checking provider status: {e}")  # Add logging
         return False, provider
 
-def request_models(provider=None):
-    """Get available models based on the current provider from settings"""
+class ModelListError(Exception):
+    """Raised when a model list could not be fetched, the message says why."""
+
+
+def fetch_models(provider=None):
+    """Return the sorted model names of provider, raising ModelListError on failure.
+
+    An empty list means the provider answered but offers no models.
+    """
     if provider is None:
         provider = get_provider()
     
@@ -325,28 +645,31 @@ def request_models(provider=None):
     try:
         start_time = datetime.now()
         
-        # Common configuration
+        # Common configuration, a listing is as patient as a health probe
         request_config = {
-            "timeout": 0.5,
+            "timeout": get_health_settings()["probe_timeout"],
             "headers": {"Accept": "application/json"}
         }
         
         if provider == "ollama":
-            base_url = get_ollama_url()
-            if not base_url:
-                return ["Please configure Ollama URL"]
-            
-            request_config["url"] = f"{base_url}/api/tags"
-            request_config["headers"]["Connection"] = "close"
-            
+            if not get_ollama_url():
+                raise ModelListError("Please configure Ollama URL")
+
+            # Every node of the endpoint pool is listed, models are offered if any node has them
+            models = endpoint_pool.fetch_models(request_config["timeout"])
+            if DEBUG:
+                elapsed = (datetime.now() - start_time).total_seconds()
+                print(f"Loading models took {elapsed:.2f} seconds")
+            return models
+
         elif provider == "openai":
             api_key = get_openai_key()
             base_url = get_openai_url()
             
             if not api_key:
-                return ["Please configure OpenAI API key"]
+                raise ModelListError("Please configure OpenAI API key")
             if not base_url:
-                return ["Please configure OpenAI URL"]
+                raise ModelListError("Please configure OpenAI URL")
                 
             request_config["url"] = f"{base_url}/models"
             request_config["headers"].update({
@@ -355,36 +678,49 @@ def request_models(provider=None):
             })
             
         else:
-            return [f"Invalid provider: {provider}"]
+            raise ModelListError(f"Invalid provider: {provider}")
         
-        # Make the request
-        response = requests.get(**request_config)
+        # Make the request over the pooled keep-alive session
+        response = connection_manager.get(**request_config)
         response.raise_for_status()
         
-        # Parse response based on provider
-        if provider == "ollama":
-            models = [model["name"] for model in response.json().get("models", [])]
-        else:  # openai
-            models = [model["id"] for model in response.json().get("data", [])]
-            models = sorted(models)
-        
+        models = sorted(model["id"] for model in response.json().get("data", []))
+
         if DEBUG:
             elapsed = (datetime.now() - start_time).total_seconds()
             print(f"Loading models took {elapsed:.2f} seconds")
-            if provider == "openai":
-                print(response.json().get("data", []))
-        
-        return models if models else [f"No {'compatible ' if provider == 'openai' else ''}models found"]
+            print(response.json().get("data", []))
+
+        return models
             
+    except ModelListError:
+        raise
     except requests.Timeout:
         if DEBUG:
             print("Timeout loading models")
-        return ["Error loading models"]
+        raise ModelListError("Error loading models")
     except requests.ConnectionError:
         if DEBUG:
             print(f"Cannot connect to {provider.title()} API")
-        return [f"Cannot connect to {provider.title()} API"]
+        raise ModelListError(f"Cannot connect to {provider.title()} API")
     except Exception as e:
         if DEBUG:
             print(f"Error loading {provider} models: {e}")
-        return [f"Error loading {provider.title()} models"]
\ No newline at end of file
+        raise ModelListError(f"Error loading {provider.title()} models")
+
+
+def request_models(provider=None):
+    """Get available models based on the current provider from settings
+
+    Failures and empty lists come back as a single placeholder entry,
+    use fetch_models to tell them apart from model names.
+    """
+    if provider is None:
+        provider = get_provider()
+    try:
+        models = fetch_models(provider)
+    except ModelListError as e:
+        return [str(e)]
+    if models:
+        return models
+    return ["No compatible models found" if provider == "openai" else "No models found"]
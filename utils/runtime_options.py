@@ -0,0 +1,139 @@
+import sys
+import threading
+from utils.connection_manager import connection_manager
+from utils.endpoint_pool import endpoint_pool
+from utils.settings_manager import get_ollama_keep_alive, get_runtime_option_settings
+
+DEBUG = "-debug" in sys.argv
+
+# Ollama performance knobs and the smallest value each accepts
+OLLAMA_OPTIONS = {
+    "num_ctx": 1,
+    "num_predict": -2,  # -1 generates until done, -2 until the context is full
+    "num_thread": 1,
+    "num_gpu": -1,  # -1 lets Ollama decide how many layers to offload
+    "num_batch": 1,
+}
+
+_context_lengths = {}  # model -> context length reported by /api/show
+_context_lock = threading.Lock()
+_warned = set()  # Config problems already reported, options are rebuilt per request
+
+
+def _warn(message):
+    if message not in _warned:
+        _warned.add(message)
+        print(message)
+
+
+def validate_options(options, source="options"):
+    """Return the valid runtime options, printing a warning for every dropped one."""
+    valid = {}
+    if not isinstance(options, dict):
+        _warn(f"Ignoring {source}: expected an object, got {type(options).__name__}")
+        return valid
+
+    for key, value in options.items():
+        if key == "keep_alive":
+            if isinstance(value, (int, str)) and not isinstance(value, bool):
+                valid[key] = value
+            else:
+                _warn(f"Ignoring {source}.{key}: expected a duration or seconds")
+        elif key in OLLAMA_OPTIONS or key == "max_tokens":
+            minimum = OLLAMA_OPTIONS.get(key, 1)
+            if isinstance(value, bool) or not isinstance(value, int):
+                _warn(f"Ignoring {source}.{key}: expected an integer, got {value!r}")
+            elif value < minimum:
+                _warn(f"Ignoring {source}.{key}: {value} is below {minimum}")
+            else:
+                valid[key] = value
+        else:
+            _warn(f"Ignoring unknown runtime option {source}.{key}")
+    return valid
+
+
+def get_runtime_options(model, context_size=None):
+    """Merge the runtime options for model.
+
+    Precedence, lowest first: global "runtime_options", the Context Size
+    field of the settings page, then "model_runtime_options" for the base
+    model name and finally for the exact model tag.
+    """
+    settings = get_runtime_option_settings()
+    options = validate_options(settings["global"], "runtime_options")
+    if context_size:
+        options["num_ctx"] = int(context_size)
+
+    per_model = settings["per_model"] if isinstance(settings["per_model"], dict) else {}
+    base_model = model.split(":")[0] if model else model
+    names = [base_model] if base_model == model else [base_model, model]
+    for name in names:
+        if name in per_model:
+            options.update(
+                validate_options(per_model[name], f"model_runtime_options.{name}")
+            )
+    return options
+
+
+def get_model_context_length(model):
+    """Return the trained context length Ollama reports for model, cached per model."""
+    with _context_lock:
+        if model in _context_lengths:
+            return _context_lengths[model]
+
+    context_length = None
+    try:
+        response = connection_manager.post(
+            f"{endpoint_pool.choose(model)}/api/show", json={"model": model}, timeout=(2, 10)
+        )
+        response.raise_for_status()
+        model_info = response.json().get("model_info") or {}
+        for key, value in model_info.items():
+            if key.endswith(".context_length") and isinstance(value, int):
+                context_length = value
+                break
+    except Exception as e:
+        if DEBUG:
+            print(f"Could not read the context length of {model}: {e}")
+        return None  # Not cached, try again on the next request
+
+    with _context_lock:
+        _context_lengths[model] = context_length
+    return context_length
+
+
+def build_ollama_options(model, temperature=None, context_size=None):
+    """Return (options, keep_alive) for an Ollama chat request."""
+    options = get_runtime_options(model, context_size)
+    keep_alive = options.pop("keep_alive", get_ollama_keep_alive())
+
+    # OpenAI's name for the same limit
+    max_tokens = options.pop("max_tokens", None)
+    if max_tokens is not None:
+        options.setdefault("num_predict", max_tokens)
+
+    num_ctx = options.get("num_ctx")
+    if num_ctx:
+        context_length = get_model_context_length(model)
+        if context_length and num_ctx > context_length:
+            _warn(
+                f"num_ctx {num_ctx} exceeds the {context_length} tokens {model} "
+                f"supports, using {context_length}"
+            )
+            options["num_ctx"] = context_length
+
+    if temperature is not None:
+        options["temperature"] = temperature
+    return options, keep_alive
+
+
+def build_openai_params(model, temperature=None):
+    """Return the extra request fields for an OpenAI chat completion."""
+    options = get_runtime_options(model)
+    params = {}
+    max_tokens = options.get("max_tokens", options.get("num_predict"))
+    if max_tokens is not None and max_tokens > 0:
+        params["max_tokens"] = max_tokens
+    if temperature is not None:
+        params["temperature"] = temperature
+    return params
@@ -28,6 +28,42 @@ class SettingsManager:
         config.setdefault("system_prompt", "")
         config.setdefault("vision_capable_models", [])
 
+        config.setdefault("stream_frame_budget_ms", 16)
+        config.setdefault("stream_frame_budget_max_ms", 100)
+
+        config.setdefault("http_pool_size", 4)
+        config.setdefault("http_keep_alive", True)
+        config.setdefault("http_connect_timeout", 5)
+        config.setdefault("http_read_timeout", 300)
+
+        config.setdefault("engine_stream_workers", 4)
+        config.setdefault("engine_background_workers", 4)
+
+        config.setdefault("model_catalog_ttl_s", 30)
+
+        config.setdefault("health_probe_timeout_s", 2.0)
+        config.setdefault("health_interval_s", 30)
+        config.setdefault("health_backoff_min_s", 1)
+        config.setdefault("health_backoff_max_s", 30)
+
+        config.setdefault("ollama_keep_alive", "30m")
+        config.setdefault("ollama_extra_urls", [])
+        config.setdefault("runtime_options", {})
+        config.setdefault("model_runtime_options", {})
+
+        config.setdefault("context_budget_tokens", None)
+        config.setdefault("context_budget_ratio", 0.75)
+        config.setdefault("context_default_size", 4096)
+        config.setdefault("context_image_turns", 2)
+
+        config.setdefault("image_cache_max_mb", 256)
+        config.setdefault("image_cache_max_age_days", 30)
+
+        config.setdefault("stream_first_byte_timeout_s", 300)
+        config.setdefault("stream_stall_timeout_s", 60)
+        config.setdefault("stream_retry_attempts", 3)
+        config.setdefault("stream_retry_backoff_s", 1)
+
         return config
 
     @staticmethod
@@ -94,3 +130,115 @@ def get_ollama_url():
         return settings.get("ollama_url", "http://localhost:11434")
     except FileNotFoundError:
         return "http://localhost:11434"
+
+
+def get_stream_frame_budget():
+    """Return the (base, max) interval in ms between streamed UI updates."""
+    settings = load_settings_from_file()
+    return (
+        settings.get("stream_frame_budget_ms", 16),
+        settings.get("stream_frame_budget_max_ms", 100),
+    )
+
+
+def get_http_settings():
+    """Return the pooling, keep-alive and timeout settings for provider connections."""
+    settings = load_settings_from_file()
+    return {
+        "pool_size": settings.get("http_pool_size", 4),
+        "keep_alive": settings.get("http_keep_alive", True),
+        "connect_timeout": settings.get("http_connect_timeout", 5),
+        "read_timeout": settings.get("http_read_timeout", 300),
+    }
+
+
+def get_engine_settings():
+    """Return the worker counts of the provider engine, chat streams get their own."""
+    settings = load_settings_from_file()
+    return {
+        "stream_workers": settings.get("engine_stream_workers", 4),
+        "background_workers": settings.get("engine_background_workers", 4),
+    }
+
+
+def get_model_catalog_ttl():
+    """Return how many seconds a fetched model list is considered fresh."""
+    settings = load_settings_from_file()
+    return settings.get("model_catalog_ttl_s", 30)
+
+
+def get_health_settings():
+    """Return the provider health probe timeout, idle interval and backoff bounds in seconds."""
+    settings = load_settings_from_file()
+    return {
+        "probe_timeout": settings.get("health_probe_timeout_s", 2.0),
+        "interval": settings.get("health_interval_s", 30),
+        "backoff_min": settings.get("health_backoff_min_s", 1),
+        "backoff_max": settings.get("health_backoff_max_s", 30),
+    }
+
+
+def get_ollama_endpoints():
+    """Return the Ollama URL followed by the "ollama_extra_urls" of further nodes."""
+    settings = load_settings_from_file()
+    urls = [settings.get("ollama_url", "http://localhost:11434")]
+    extra = settings.get("ollama_extra_urls", [])
+    if isinstance(extra, list):
+        urls += [url for url in extra if isinstance(url, str)]
+    endpoints = []
+    for url in urls:
+        url = url.strip().rstrip("/")
+        if url and url not in endpoints:
+            endpoints.append(url)
+    return endpoints
+
+
+def get_ollama_keep_alive():
+    """Return how long Ollama should keep the active model loaded ("30m", 600, -1)."""
+    settings = load_settings_from_file()
+    return settings.get("ollama_keep_alive", "30m")
+
+
+def get_runtime_option_settings():
+    """Return the global and per-model runtime options (num_ctx, num_predict, ...)."""
+    settings = load_settings_from_file()
+    return {
+        "global": settings.get("runtime_options", {}),
+        "per_model": settings.get("model_runtime_options", {}),
+    }
+
+
+def get_context_budget_settings():
+    """Return how the outgoing history is budgeted against the context window."""
+    settings = load_settings_from_file()
+    return {
+        "budget_tokens": settings.get("context_budget_tokens"),
+        "ratio": settings.get("context_budget_ratio", 0.75),
+        "default_context_size": settings.get("context_default_size", 4096),
+    }
+
+
+def get_context_image_turns():
+    """Return how many recent user turns keep their images in outgoing requests."""
+    settings = load_settings_from_file()
+    return settings.get("context_image_turns", 2)
+
+
+def get_image_cache_settings():
+    """Return the size and age limits of the on-disk image cache."""
+    settings = load_settings_from_file()
+    return {
+        "max_bytes": settings.get("image_cache_max_mb", 256) * 1024 * 1024,
+        "max_age_s": settings.get("image_cache_max_age_days", 30) * 86400,
+    }
+
+
+def get_stream_resilience_settings():
+    """Return the stream watchdog timeouts and the retry policy for failed request setups."""
+    settings = load_settings_from_file()
+    return {
+        "first_byte_timeout": settings.get("stream_first_byte_timeout_s", 300),
+        "stall_timeout": settings.get("stream_stall_timeout_s", 60),
+        "retry_attempts": settings.get("stream_retry_attempts", 3),
+        "retry_backoff": settings.get("stream_retry_backoff_s", 1),
+    }
@@ -0,0 +1,279 @@
+import json
+import sys
+import time
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError, SSLError
+
+try:
+    import orjson
+
+    _loads = orjson.loads  # Optional, noticeably faster on the slow path
+except ImportError:
+    _loads = json.loads
+
+# Most bytes returned per read, each read returns whatever already arrived
+STREAM_READ_SIZE = 16384
+
+_CONTENT_KEY = b'"content":"'
+_DONE_KEY = b'"done":true'
+_USAGE_KEY = b'"usage":{'
+_SSE_DATA = b"data:"
+_SSE_DONE = b"[DONE]"
+
+
+def iter_stream_lines(chunks):
+    """Split an iterable of byte chunks into lines, carrying partial lines across reads."""
+    pending = b""
+    for chunk in chunks:
+        if pending:
+            chunk = pending + chunk
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            if end > start:
+                yield chunk[start:end]
+            start = end + 1
+        pending = chunk[start:]
+    if pending:
+        yield pending
+
+
+def _fast_content(line):
+    """Pull the first "content" string straight out of a JSON line.
+
+    Returns None when the line needs a real JSON parse: no compact content
+    key, or escape sequences inside the value.
+    """
+    start = line.find(_CONTENT_KEY)
+    if start < 0:
+        return None
+    start += len(_CONTENT_KEY)
+    end = line.find(b'"', start)
+    if end < 0 or line.find(b"\\", start, end) >= 0:
+        return None
+    return line[start:end].decode("utf-8")
+
+
+def parse_ollama_line(line):
+    """Return the message content of one Ollama NDJSON line, or None."""
+    content = _fast_content(line)
+    if content is not None:
+        return content
+    try:
+        chunk = _loads(line)
+    except ValueError:
+        return None
+    message = chunk.get("message") if isinstance(chunk, dict) else None
+    if isinstance(message, dict):
+        return message.get("content")
+    return None
+
+
+def parse_openai_line(line):
+    """Return the delta content of one OpenAI SSE line, or None.
+
+    Raises StopIteration on the [DONE] sentinel.
+    """
+    if not line.startswith(_SSE_DATA):
+        return None  # Comments, event names, keep-alives
+    data = line[len(_SSE_DATA):].strip()
+    if data == _SSE_DONE:
+        raise StopIteration
+    content = _fast_content(data)
+    if content is not None:
+        return content
+    try:
+        chunk = _loads(data)
+    except ValueError:
+        return None
+    try:
+        return chunk["choices"][0]["delta"].get("content")
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None  # Usage and other choice-less chunks
+
+
+def _parse_stats(data, keys):
+    """Fully parse a stats frame and keep the numeric fields in keys."""
+    try:
+        frame = _loads(data)
+    except ValueError:
+        return {}
+    if not isinstance(frame, dict):
+        return {}
+    return {
+        key: value
+        for key, value in frame.items()
+        if key in keys and isinstance(value, (int, float))
+    }
+
+
+# Timing fields of Ollama's final frame, durations are in nanoseconds
+OLLAMA_STATS_KEYS = {
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+}
+
+
+def iter_ollama_content(chunks, stats=None):
+    """Yield the content strings of an Ollama /api/chat stream.
+
+    When a stats dict is given it receives the timing fields of the final frame.
+    """
+    for line in iter_stream_lines(chunks):
+        content = parse_ollama_line(line)
+        if content:
+            yield content
+        elif stats is not None and _DONE_KEY in line:
+            stats.update(_parse_stats(line, OLLAMA_STATS_KEYS))
+
+
+def iter_openai_content(chunks, stats=None):
+    """Yield the delta content strings of an OpenAI chat completions SSE stream.
+
+    When a stats dict is given it receives the token usage, if the server sends it.
+    """
+    for line in iter_stream_lines(chunks):
+        try:
+            content = parse_openai_line(line)
+        except StopIteration:
+            return
+        if content:
+            yield content
+        elif stats is not None and _USAGE_KEY in line:
+            try:
+                frame = _loads(line[len(_SSE_DATA):])
+            except ValueError:
+                continue
+            usage = frame.get("usage") if isinstance(frame, dict) else None
+            if isinstance(usage, dict):
+                stats.update({k: v for k, v in usage.items() if isinstance(v, int)})
+
+
+def iter_response_chunks(response, stats=None):
+    """Read a streaming requests response in large buffers, yielding data as it arrives.
+
+    When a stats dict is given its "bytes_received" counts the bytes read.
+    """
+    if hasattr(response.raw, "read1"):
+        chunks = _read_available(response.raw)
+    else:
+        # urllib3 1.x, blocks until STREAM_READ_SIZE arrived unless the response is chunked
+        chunks = response.iter_content(chunk_size=STREAM_READ_SIZE)
+    if stats is None:
+        return chunks
+    return _count_bytes(chunks, stats)
+
+
+def _read_available(raw):
+    """Yield what is buffered or arrives next, up to STREAM_READ_SIZE per read.
+
+    iter_content waits for a full STREAM_READ_SIZE on responses that are not
+    chunked, e.g. SSE with Connection: close, which would hold back the first
+    tokens until the stream ends. urllib3 errors are raised as the requests
+    exceptions iter_content would raise.
+    """
+    try:
+        while True:
+            data = raw.read1(STREAM_READ_SIZE, decode_content=True)
+            if not data:
+                return
+            yield data
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.ConnectionError(e)
+    except SSLError as e:
+        raise requests.exceptions.SSLError(e)
+
+
+def _count_bytes(chunks, stats):
+    stats.setdefault("bytes_received", 0)
+    for chunk in chunks:
+        stats["bytes_received"] += len(chunk)
+        yield chunk
+
+
+def _baseline_ollama(data):
+    # What the request loop used to do: one json.loads per line
+    for line in data.splitlines():
+        if line:
+            chunk = json.loads(line)
+            if "message" in chunk and "content" in chunk["message"]:
+                yield chunk["message"]["content"]
+
+
+def _baseline_openai(data):
+    for line in data.splitlines():
+        if line:
+            line = line.decode("utf-8")
+            if line.startswith("data: "):
+                if line == "data: [DONE]":
+                    break
+                try:
+                    json_data = json.loads(line[6:])
+                    content = json_data["choices"][0]["delta"].get("content", "")
+                    if content:
+                        yield content
+                except (json.JSONDecodeError, KeyError, IndexError):
+                    continue
+
+
+def _synthetic_stream(tokens=20000):
+    """Build an Ollama-style NDJSON stream with a realistic share of escaped tokens."""
+    words = ["Hello", " world", ",", " the", " quick", "\n", " `code`", ' "quoted"', " é", "\n\n"]
+    lines = []
+    for i in range(tokens):
+        lines.append(
+            json.dumps(
+                {
+                    "model": "llama3.1:8b",
+                    "created_at": "2024-01-01T00:00:00.000000Z",
+                    "message": {"role": "assistant", "content": words[i % len(words)]},
+                    "done": False,
+                },
+                separators=(",", ":"),
+            )
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def benchmark(data, repeat=5):
+    """Compare parse throughput in tokens/s against the old per-line json.loads loop."""
+    is_sse = data.lstrip().startswith(_SSE_DATA)
+    fast = iter_openai_content if is_sse else iter_ollama_content
+    baseline = _baseline_openai if is_sse else _baseline_ollama
+    reads = [data[i:i + STREAM_READ_SIZE] for i in range(0, len(data), STREAM_READ_SIZE)]
+
+    results = {}
+    for name, run in (("baseline", lambda: baseline(data)), ("parser", lambda: fast(reads))):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tokens = sum(1 for _ in run())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = (tokens, tokens / best if best else 0.0)
+
+    if "".join(baseline(data)) != "".join(fast(reads)):
+        print("Warning: parser output differs from the baseline")
+    return results
+
+
+if __name__ == "__main__":
+    # python -m utils.stream_parser [recorded_stream_file]
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            stream_data = f.read()
+    else:
+        stream_data = _synthetic_stream()
+    print(f"JSON backend: {_loads.__module__}")
+    for name, (tokens, rate) in benchmark(stream_data).items():
+        print(f"{name}: {tokens} tokens, {rate:,.0f} tokens/s")
@@ -0,0 +1,237 @@
+import json
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from utils.provider_engine import get_provider_engine
+
+DEBUG = "-debug" in sys.argv
+# Save every completed stream to RECORDINGS_DIR
+RECORD = "-record" in sys.argv
+
+RECORDINGS_DIR = Path(__file__).parent.parent / "recordings"
+
+
+def _get_argv_value(flag, default=None):
+    if flag in sys.argv:
+        index = sys.argv.index(flag)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+
+def get_replay_settings():
+    """Return (path, speed) from -replay <file or dir> [-replay-speed N], or None.
+
+    Speed 1 keeps the recorded timing, 4 plays four times faster and 0 as
+    fast as possible.
+    """
+    path = _get_argv_value("-replay")
+    if not path:
+        return None
+    try:
+        speed = float(_get_argv_value("-replay-speed", 1))
+    except ValueError:
+        print("Invalid -replay-speed, using 1")
+        speed = 1.0
+    return Path(path), max(speed, 0.0)
+
+
+class StreamRecorder:
+    """Collect the chunks of one stream with their offsets from the request start."""
+
+    def __init__(self, provider, model):
+        self.provider = provider
+        self.model = model
+        self.started = time.perf_counter()
+        self.chunks = []  # [offset seconds, text]
+
+    def add(self, chunk):
+        self.chunks.append([round(time.perf_counter() - self.started, 4), chunk])
+
+    def save(self, directory=RECORDINGS_DIR):
+        """Write the recording as JSON and return its path, None if it failed."""
+        if not self.chunks:
+            return None
+        recorded_at = datetime.now()
+        safe_model = re.sub(r"[^\w.-]+", "_", self.model or "model")
+        path = Path(directory) / f"{recorded_at:%Y%m%d-%H%M%S-%f}_{safe_model}.json"
+        data = {
+            "version": 1,
+            "provider": self.provider,
+            "model": self.model,
+            "recorded_at": recorded_at.isoformat(timespec="seconds"),
+            "chunks": self.chunks,
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving stream recording: {e}")
+            return None
+        if DEBUG:
+            print(f"Recorded {len(self.chunks)} chunks to {path}")
+        return path
+
+
+def load_recording(path):
+    """Load a recording saved by StreamRecorder."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data.get("chunks"), list):
+        raise ValueError(f"{path} is not a stream recording")
+    return data
+
+
+def list_recordings(path):
+    """Return the recording files at path, a single file or a directory of them."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob("*.json"))
+    return [path] if path.exists() else []
+
+
+def summarize_recording(recording):
+    """Return chunk count, characters, duration, TTFT and chunk rate of a recording."""
+    chunks = recording["chunks"]
+    duration = chunks[-1][0] if chunks else 0.0
+    ttft = chunks[0][0] if chunks else 0.0
+    decode_s = duration - ttft
+    return {
+        "chunks": len(chunks),
+        "chars": sum(len(text) for _, text in chunks),
+        "duration_s": duration,
+        "ttft_s": ttft,
+        "chunks_per_s": (len(chunks) - 1) / decode_s if decode_s > 0 else None,
+    }
+
+
+class ReplayRequest(QObject):
+    """Feed a recording back like a ProviderRequest, at recorded or scaled speed.
+
+    Runs on the provider engine and emits the same signals, so the chunks go
+    through the coalescer and ChatBox.handle_response_chunk exactly like a
+    live stream. No metrics are emitted, replays never reach the metrics log.
+    """
+
+    response_chunk_ready = pyqtSignal(str, str)
+    response_complete = pyqtSignal(str)
+    metrics_ready = pyqtSignal(str, dict)
+    response_truncated = pyqtSignal(str, str)
+
+    def __init__(self, recording, speed=1.0, message_id=None):
+        super().__init__()
+        self.recording = recording
+        self.speed = speed
+        self.message_id = message_id
+        self.future = None
+        self.cancelled = False
+        self.started = None
+        self.delivered = 0  # Chunks emitted so far
+        self._cancel_event = threading.Event()
+        self._finished = threading.Event()
+
+    def start(self):
+        engine = get_provider_engine()
+        engine.track(self)
+        self.future = engine.submit(self.run, stream=True)
+
+    def isRunning(self):
+        return self.future is not None and not self._finished.is_set()
+
+    def cancel(self):
+        self.cancelled = True
+        self._cancel_event.set()
+
+    def wait(self, timeout=None):
+        if self.future is None:
+            return True
+        return self._finished.wait(timeout)
+
+    def run(self):
+        try:
+            self.started = time.perf_counter()
+            for offset, chunk in self.recording["chunks"]:
+                if self.speed > 0:
+                    delay = self.started + offset / self.speed - time.perf_counter()
+                    # Waiting on the event keeps cancel() immediate
+                    if delay > 0 and self._cancel_event.wait(delay):
+                        break
+                if self.cancelled:
+                    break
+                self.response_chunk_ready.emit(chunk, self.message_id)
+                self.delivered += 1
+            if not self.cancelled:
+                get_provider_engine().post(self.response_complete.emit, self.message_id)
+        finally:
+            self._finished.set()
+
+
+class FrameMonitor(QObject):
+    """Measure UI thread stalls with a timer that should fire every frame.
+
+    A tick arriving more than twice the interval late counts as dropped
+    frames, the longest gap is the worst stall the user could see.
+    """
+
+    def __init__(self, interval_ms=16, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+        self._last = None
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.dropped_frames = 0
+        self.max_gap_ms = 0.0
+
+    def start(self):
+        self.reset()
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        return self.get_stats()
+
+    def get_stats(self):
+        return {
+            "ticks": self.ticks,
+            "dropped_frames": self.dropped_frames,
+            "max_gap_ms": round(self.max_gap_ms, 1),
+        }
+
+    def _tick(self):
+        now = time.perf_counter()
+        gap_ms = (now - self._last) * 1000
+        self._last = now
+        self.ticks += 1
+        self.max_gap_ms = max(self.max_gap_ms, gap_ms)
+        if gap_ms > self.interval_ms * 2:
+            self.dropped_frames += int(gap_ms // self.interval_ms) - 1
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.stream_recording [file or directory]
+    target = sys.argv[1] if len(sys.argv) > 1 else RECORDINGS_DIR
+    paths = list_recordings(target)
+    if not paths:
+        print(f"No recordings found in {target}")
+    for path in paths:
+        recording = load_recording(path)
+        summary = summarize_recording(recording)
+        rate = summary["chunks_per_s"]
+        print(
+            f"{path.name}: {recording.get('model')} "
+            f"{summary['chunks']} chunks, {summary['chars']} chars, "
+            f"ttft {summary['ttft_s']:.2f}s, {summary['duration_s']:.2f}s, "
+            f"{f'{rate:.1f}' if rate else '-'} chunks/s"
+        )
@@ -0,0 +1,169 @@
+import sys
+import threading
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from utils.settings_manager import get_stream_frame_budget
+
+DEBUG = "-debug" in sys.argv
+
+
+class ChunkCoalescer(QObject):
+    """Buffer streamed deltas and hand them to the UI at most once per frame budget.
+
+    push() is thread-safe and is meant to be called directly from the provider
+    thread, so only one queued event crosses into the UI thread per flush
+    instead of one per token.
+    """
+
+    chunk_flushed = pyqtSignal(str, str)
+    _chunks_pending = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.base_budget_ms, self.max_budget_ms = get_stream_frame_budget()
+        self.budget_ms = self.base_budget_ms
+
+        self._lock = threading.Lock()
+        self._segments = []  # [message_id, [parts], is_error]
+        self._pending = False
+        self._last_flush = 0.0
+        self._scheduled_at = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._chunks_pending.connect(self._schedule_flush)
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the merge counters."""
+        self.chunks_received = 0
+        self.flush_count = 0
+        self.last_merged = 0
+        self.max_merged = 0
+
+    def get_stats(self):
+        """Return the merge counters as a dictionary."""
+        return {
+            "chunks_received": self.chunks_received,
+            "flushes": self.flush_count,
+            "last_merged": self.last_merged,
+            "max_merged": self.max_merged,
+            "avg_merged": (
+                self.chunks_received / self.flush_count if self.flush_count else 0.0
+            ),
+            "budget_ms": self.budget_ms,
+        }
+
+    def push(self, chunk, message_id):
+        """Queue a chunk for the next flush. Safe to call from any thread."""
+        is_error = chunk.startswith("Error:")
+        with self._lock:
+            last = self._segments[-1] if self._segments else None
+            # Errors replace the message content, so never merge them with text
+            if last and last[0] == message_id and not is_error and not last[2]:
+                last[1].append(chunk)
+            else:
+                self._segments.append([message_id, [chunk], is_error])
+            self.chunks_received += 1
+            notify = not self._pending
+            self._pending = True
+
+        if notify:
+            self._chunks_pending.emit()
+
+    def _schedule_flush(self):
+        """Arm the flush timer for the remainder of the current frame budget."""
+        if self._timer.isActive():
+            return
+        now = time.perf_counter()
+        elapsed_ms = (now - self._last_flush) * 1000
+        delay_ms = max(0, int(self.budget_ms - elapsed_ms))
+        self._scheduled_at = now + delay_ms / 1000
+        self._timer.start(delay_ms)
+
+    def flush(self):
+        """Emit everything buffered so far, one signal per message segment."""
+        self._timer.stop()
+        with self._lock:
+            segments = self._segments
+            self._segments = []
+            self._pending = False
+
+        if not segments:
+            return
+
+        start = time.perf_counter()
+        lag_ms = (start - self._scheduled_at) * 1000 if self._scheduled_at else 0.0
+        self._scheduled_at = None
+
+        merged = sum(len(parts) for _, parts, _ in segments)
+        for message_id, parts, _ in segments:
+            self.chunk_flushed.emit("".join(parts), message_id)
+
+        self._last_flush = time.perf_counter()
+        handle_ms = (self._last_flush - start) * 1000
+        self._adapt_budget(max(lag_ms, handle_ms))
+
+        self.flush_count += 1
+        self.last_merged = merged
+        self.max_merged = max(self.max_merged, merged)
+
+        if DEBUG:
+            print(
+                f"Flushed {merged} chunk(s) in {len(segments)} segment(s), "
+                f"lag {lag_ms:.1f}ms, render {handle_ms:.1f}ms, "
+                f"budget {self.budget_ms:.0f}ms"
+            )
+
+    def _adapt_budget(self, lag_ms):
+        """Back off when the event loop falls behind, recover when it keeps up."""
+        if lag_ms > self.budget_ms:
+            self.budget_ms = min(self.max_budget_ms, self.budget_ms * 2)
+        else:
+            self.budget_ms = max(self.base_budget_ms, self.budget_ms * 0.75)
+
+
+class FragmentBuffer:
+    """Append-only text buffer that only joins its fragments when the full text is read."""
+
+    def __init__(self, text=""):
+        self._fragments = [text] if text else []
+        self._length = len(text)
+        self._joined = text
+
+    def __len__(self):
+        return self._length
+
+    def append(self, text):
+        """Append a fragment without copying the existing text."""
+        if not text:
+            return
+        self._fragments.append(text)
+        self._length += len(text)
+        self._joined = None
+
+    def text(self):
+        """Return the full text, joining and compacting the fragments once."""
+        if self._joined is None:
+            self._joined = "".join(self._fragments)
+            self._fragments = [self._joined]
+        return self._joined
+
+    def text_from(self, offset):
+        """Return the text after offset, joining only the fragments it spans."""
+        if offset <= 0:
+            return self.text()
+        if offset >= self._length:
+            return ""
+
+        tail = []
+        remaining = self._length - offset
+        for fragment in reversed(self._fragments):
+            if len(fragment) >= remaining:
+                tail.append(fragment[len(fragment) - remaining :])
+                break
+            tail.append(fragment)
+            remaining -= len(fragment)
+        return "".join(reversed(tail))
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+import requests
+
+VENDOR_DIR = Path(__file__).parent.parent / "html" / "vendor"
+
+# Third-party files used by html/chat_template.html, pinned to a version
+WEB_ASSETS = {
+    "marked.min.js": "https://cdn.jsdelivr.net/npm/marked@12.0.2/marked.min.js",
+    "highlight.min.js": "https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.10.0/highlight.min.js",
+    "a11y-dark.min.css": "https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.10.0/styles/a11y-dark.min.css",
+    "MaterialIcons-Regular.ttf": "https://cdn.jsdelivr.net/gh/google/material-design-icons@4.0.0/font/MaterialIcons-Regular.ttf",
+}
+
+ASSET_MIME_TYPES = {
+    ".js": "text/javascript",
+    ".css": "text/css",
+    ".ttf": "font/ttf",
+    ".woff2": "font/woff2",
+}
+
+
+def get_asset_mime(name):
+    """Return the MIME type for a vendored asset file name."""
+    return ASSET_MIME_TYPES.get(Path(name).suffix, "application/octet-stream")
+
+
+def link_missing_assets(text, assets, scheme):
+    """Point scheme:name references to assets that are not vendored at their pinned CDN copy."""
+    for name, url in WEB_ASSETS.items():
+        if name not in assets:
+            text = text.replace(f"{scheme}:{name}", url)
+    return text
+
+
+def load_web_assets():
+    """Read every vendored asset into memory, keyed by file name."""
+    assets = {}
+    if VENDOR_DIR.is_dir():
+        for path in VENDOR_DIR.iterdir():
+            if path.is_file() and path.suffix in ASSET_MIME_TYPES:
+                assets[path.name] = path.read_bytes()
+    return assets
+
+
+def fetch_web_assets(force=False):
+    """Download missing third-party assets into html/vendor for offline use.
+
+    Does nothing when everything is vendored, so launch scripts can run it
+    every time.
+    """
+    VENDOR_DIR.mkdir(parents=True, exist_ok=True)
+    for name, url in WEB_ASSETS.items():
+        path = VENDOR_DIR / name
+        if path.exists() and not force:
+            continue
+        try:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            path.write_bytes(response.content)
+            print(f"{name}: downloaded {len(response.content)} bytes")
+        except Exception as e:
+            print(f"{name}: failed to download from {url}: {e}")
+
+
+if __name__ == "__main__":
+    fetch_web_assets(force="--force" in sys.argv)